@@ -0,0 +1,275 @@
+"""Offline benchmark for fetch_news.py.
+
+Every HTTP endpoint (NewsAPI, NewsData, TheNewsAPI, GNews, RSS feeds, Gemini) is served by a
+local stand-in: recorded fixtures when present, otherwise deterministic synthetic responses.
+The blocking SDK providers (Google Translate, Google News decoding, EventRegistry) are replaced
+by in-process stand-ins. Latency, errors and 429s can be injected.
+
+Usage:
+    python bench_news.py                                  # every category, then the hourly batch
+    python bench_news.py --latency 150 --rate-429 0.05 --runs 2 --json bench.json
+    NEWS_RECORD_DIR=bench/fixtures python fetch_news.py hourly   # record live responses once
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import hashlib
+import logging
+import argparse
+import tempfile
+import importlib
+import tracemalloc
+from aiohttp import web
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_FIXTURES = os.path.join(BASE_DIR, "bench", "fixtures")
+WORDS = ("fed rates inflation market stocks charlotte council ai model chip nvidia openai election senate court "
+         "storm panthers hornets school budget oil dollar bitcoin jobs report earnings merger lawsuit tariff "
+         "climate energy housing transit airport police fire hospital startup robot agent").split()
+
+# =========================
+# STAND-IN SERVER
+# =========================
+
+class StandIn:
+    """Local replacement for every HTTP provider. Serves <fixtures>/<fixture_key>.json when recorded,
+    otherwise synthesizes a response in the provider's shape."""
+    def __init__(self, fn, fixtures_dir, latency_ms=0, error_rate=0.0, rate_429=0.0, items=40, seed=7):
+        self.fn = fn
+        self.fixtures_dir = fixtures_dir
+        self.latency = latency_ms / 1000.0
+        self.error_rate = error_rate
+        self.rate_429 = rate_429
+        self.items = items
+        self.rng = random.Random(seed)
+        self.runner = None
+        self.url = None
+        self.served = {"fixture": 0, "synthetic": 0, "fixture_miss": 0, "injected_error": 0, "injected_429": 0, "not_modified": 0}
+        # Hosts with recorded fixtures: a synthetic reply for one of them is a replay miss, not a plain synthetic run
+        self.recorded_hosts = {name.split("-", 1)[0] for name in os.listdir(fixtures_dir) if name.endswith(".json")} if os.path.isdir(fixtures_dir) else set()
+
+    async def start(self):
+        app = web.Application(client_max_size=16 * 1024 * 1024)
+        app.router.add_route("*", "/{tail:.*}", self.handle)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}"
+        return self
+
+    async def stop(self):
+        if self.runner is not None:
+            await self.runner.cleanup()
+
+    async def handle(self, request):
+        host, _, path = request.path.lstrip("/").partition("/")
+        if self.latency:
+            await asyncio.sleep(self.rng.uniform(0.5, 1.5) * self.latency)
+        roll = self.rng.random()
+        if roll < self.rate_429:
+            self.served["injected_429"] += 1
+            return web.Response(status=429, text="rate limited")
+        if roll < self.rate_429 + self.error_rate:
+            self.served["injected_error"] += 1
+            return web.Response(status=503, text="unavailable")
+
+        url = f"https://{host}/{path}"
+        body = await request.json() if request.can_read_body else None
+        fixture_path = os.path.join(self.fixtures_dir, f"{self.fn.fixture_key(request.method, url, dict(request.query), body)}.json")
+        if os.path.exists(fixture_path):
+            with open(fixture_path, encoding="utf-8") as f:
+                fixture = json.load(f)
+            self.served["fixture"] += 1
+            status, headers, body = fixture["status"], fixture.get("headers", {}), fixture["body"]
+        else:
+            self.served["synthetic"] += 1
+            if host.replace(".", "_") in self.recorded_hosts:
+                self.served["fixture_miss"] += 1
+                logging.warning(f"stand-in: no fixture for {request.method} {url}, serving a synthetic reply")
+            status, headers, body = 200, *(await self.synthesize(host, path, request))
+
+        etag = headers.get("ETag")
+        if etag and request.headers.get("If-None-Match") == etag:
+            self.served["not_modified"] += 1
+            return web.Response(status=304, headers={"ETag": etag})
+        return web.Response(status=status, headers=headers, body=body.encode("utf-8"))
+
+    # ---- synthetic provider responses ----
+
+    def stories(self, seed_text, n):
+        """n (title, url, published) tuples. A third are "wire" stories shared across providers, with
+        publisher suffixes, so dedupe and ranking do real work."""
+        rng = random.Random(seed_text)
+        wire = random.Random("wire")
+        now = time.time() // 3600 * 3600  # Stable within the hour so conditional GETs can hit
+        out = []
+        for i in range(n):
+            if i % 3 == 0:
+                k = wire.randrange(30) if i else 0
+                title = " ".join(random.Random(f"wire{k}").sample(WORDS, 8)) + rng.choice(["", " - Reuters", " | AP News", " - Moneycontrol.com"])
+            else:
+                title = " ".join(rng.sample(WORDS, 9))
+            out.append((title.capitalize(), f"https://{seed_text.split('/')[0]}/story/{hashlib.sha1(f'{seed_text}{i}'.encode()).hexdigest()[:10]}",
+                        now - rng.uniform(0, 36) * 3600))
+        return out
+
+    async def synthesize(self, host, path, request):
+        if host == "generativelanguage.googleapis.com":
+            return self.gemini(await request.json())
+        iso = lambda ts: time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(ts))
+        stories = self.stories(f"{host}/{path}?{request.query_string}", self.items)
+        desc = "Synthetic description " * 12
+        if host == "newsapi.org" or host == "gnews.io":
+            payload = {"articles": [{"title": t, "url": u, "description": desc, "source": {"name": host}, "publishedAt": iso(p)} for t, u, p in stories]}
+        elif host == "newsdata.io":
+            payload = {"results": [{"title": t, "link": u, "description": desc, "source_id": "newsdata", "pubDate": iso(p).replace("T", " ").rstrip("Z")} for t, u, p in stories]}
+        elif host == "api.thenewsapi.com":
+            payload = {"data": [{"title": t, "url": u, "description": desc, "source": "thenewsapi", "published_at": iso(p)} for t, u, p in stories]}
+        else:
+            items = "".join(f"<item><title>{t}</title><link>{'https://news.google.com/rss/articles/' + u[-10:] if host == 'news.google.com' else u}</link>"
+                            f"<description>&lt;p&gt;{desc}&lt;/p&gt;</description><pubDate>{time.strftime('%a, %d %b %Y %H:%M:%S GMT', time.gmtime(p))}</pubDate></item>"
+                            for t, u, p in stories)
+            body = f'<?xml version="1.0"?><rss version="2.0"><channel><title>{host}</title>{items}</channel></rss>'
+            return {"Content-Type": "application/rss+xml", "ETag": f'"{hashlib.sha1(body.encode()).hexdigest()[:16]}"'}, body
+        return {"Content-Type": "application/json"}, json.dumps(payload)
+
+    def gemini(self, body):
+        prompt = body["contents"][0]["parts"][0]["text"]
+        if "Articles: " in prompt:
+            articles = json.loads(prompt.split("Articles: ", 1)[1].split("\n", 1)[0])
+            rng = random.Random(prompt)
+            result = {"articles": [{"id": a["id"], "score": round(rng.uniform(3, 9.5), 1), "sentiment": rng.choice(["Positive", "Neutral", "Negative"]),
+                                    "impact": rng.choice(["High", "Medium", "Low"]), "title": a["title"], "description": a["desc"][:200] or a["title"],
+                                    "why_matters": "Synthetic insight for benchmarking."} for a in articles]}
+        else:
+            result = {"summary": "Synthetic summary. Second sentence. Third sentence.", "insight": "Synthetic insight.", "clusters": ["Markets", "Policy", "Tech"]}
+        payload = {"candidates": [{"content": {"parts": [{"text": json.dumps(result)}]}}]}
+        return {"Content-Type": "application/json"}, json.dumps(payload)
+
+# =========================
+# NON-HTTP PROVIDER STAND-INS
+# =========================
+
+def install_sdk_stand_ins(fn, latency_ms):
+    delay = latency_ms / 1000.0
+
+    class StandInTranslator:
+        def __init__(self, source="auto", target="en"):
+            self.target = target
+
+        def translate(self, text):
+            time.sleep(delay)
+            return "\n".join(f"[{self.target}] {line}" for line in text.split("\n"))
+
+    def stand_in_resolve_url(url):
+        time.sleep(delay)
+        return url.replace("news.google.com/rss/articles", "publisher.example/story")
+
+    def stand_in_event_registry(api_key, params):
+        time.sleep(delay)
+        return [{"title": f"Eventregistry ai story {i} " + " ".join(random.Random(i).sample(WORDS, 6)), "url": f"https://eventregistry.example/{i}",
+                 "description": "Synthetic body " * 20, "source": "EventRegistry", "published_at": ""} for i in range(params.get("maxItems", 25))]
+
+    fn.new_translator = lambda target_lang: StandInTranslator(target=fn.LANG_CODES[target_lang])
+    fn.resolve_url = stand_in_resolve_url
+    fn.fetch_event_registry = stand_in_event_registry
+
+# =========================
+# BENCHMARK
+# =========================
+
+def reset_state(fn, cache_dir):
+    """Cold start: empty every persistent cache, the article store and the Gemini token bucket."""
+    fn.STORE.close()
+    for name in os.listdir(cache_dir):
+        os.remove(os.path.join(cache_dir, name))
+    for cache in fn.CACHES:
+        cache.data, cache.dirty = None, False
+    fn.GEMINI_LIMITER = fn.TokenBucket(fn.GEMINI_RPM / 60.0, fn.GEMINI_BURST)
+
+async def run_scenario(fn, name, cat_ids, run_no):
+    tracemalloc.reset_peak()
+    started = time.perf_counter()
+    results = await fn.run_pipeline(cat_ids)
+    wall = time.perf_counter() - started
+    fn.save_caches()
+    snap = fn.METRICS.snapshot()
+    return {
+        "scenario": name,
+        "run": run_no,
+        "wall_s": round(wall, 3),
+        "peak_mem_mb": round(tracemalloc.get_traced_memory()[1] / 2**20, 2),
+        "succeeded": [cid for cid, ok in results.items() if ok],
+        "stages_s": {k: round(v["sum"], 3) for k, v in sorted(snap["timings"].items()) if k.startswith("stage.")},
+        "counters": {k: v for k, v in snap["counters"].items() if k.startswith(("retries.", "gemini.", "artifacts."))},
+        "cache_hit_ratio": snap["cache_hit_ratio"],
+    }
+
+async def bench(fn, args, cache_dir):
+    stand_in = await StandIn(fn, args.fixtures, args.latency, args.error_rate, args.rate_429, args.items).start()
+    fn.REPLAY_URL = stand_in.url
+    scenarios = [(cid, [cid]) for cid in fn.CATEGORIES] + [("hourly", [cid for cid in fn.CATEGORIES if cid != "ai"])]
+    if args.only:
+        scenarios = [s for s in scenarios if s[0] in args.only]
+    reports = []
+    try:
+        for name, cat_ids in scenarios:
+            reset_state(fn, cache_dir)
+            for run_no in range(1, args.runs + 1):  # Run 1 is cold; later runs reuse the caches
+                reports.append(await run_scenario(fn, name, cat_ids, run_no))
+                print_report(reports[-1])
+    finally:
+        await fn.ENGINE.close()
+        await stand_in.stop()
+        fn.STORE.close()
+    return {"config": vars(args), "stand_in": stand_in.served, "reports": reports}
+
+def print_report(r):
+    label = f"{r['scenario']} (run {r['run']})"
+    print(f"{label:<22} wall {r['wall_s']:>8.2f}s   peak {r['peak_mem_mb']:>7.2f} MB   ok {','.join(r['succeeded']) or '-'}")
+    for stage, seconds in r["stages_s"].items():
+        print(f"    {stage:<36} {seconds:>8.3f}s")
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline fetch_news.py benchmark against recorded/synthetic provider fixtures.")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES, help="Directory of recorded fixtures (NEWS_RECORD_DIR output)")
+    parser.add_argument("--latency", type=float, default=50, help="Mean injected latency per request, ms")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of HTTP requests answered with 503")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Fraction of HTTP requests answered with 429")
+    parser.add_argument("--items", type=int, default=40, help="Articles per synthetic source")
+    parser.add_argument("--runs", type=int, default=1, help="Runs per scenario; run 1 is cold, later runs are warm")
+    parser.add_argument("--gemini-rpm", type=float, default=600, help="GEMINI_RPM for the run (the stand-in has no quota)")
+    parser.add_argument("--only", nargs="*", help="Scenarios to run (category ids and/or hourly)")
+    parser.add_argument("--json", help="Write the full report to this file")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args()
+
+    # fetch_news reads its configuration at import time
+    cache_dir = tempfile.mkdtemp(prefix="news-bench-cache-")
+    os.environ.update({"NEWS_CACHE_DIR": cache_dir, "GEMINI_RPM": str(args.gemini_rpm), "GEMINI_BURST": "4",
+                       "NEWS_API_KEY": "bench", "NEWSDATA_KEY": "bench", "THENEWS_KEY": "bench",
+                       "GNEWS_KEY": "bench", "NEWS_API_AI_KEY": "bench", "GEMINI_KEY": "bench"})
+    os.environ.pop("NEWS_RECORD_DIR", None)
+    sys.path.insert(0, BASE_DIR)
+    fn = importlib.import_module("fetch_news")
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format=fn.LOG_FORMAT)
+    fn.OUTPUT_DIR = tempfile.mkdtemp(prefix="news-bench-out-")
+    install_sdk_stand_ins(fn, args.latency)
+    fn.MAX_ITEMS_PER_SOURCE = max(fn.MAX_ITEMS_PER_SOURCE, args.items)  # Let --items scale the candidate pool
+
+    tracemalloc.start()
+    report = asyncio.run(bench(fn, args, cache_dir))
+    print(f"stand-in: {report['stand_in']}")
+    if report["stand_in"]["fixture_miss"]:
+        print(f"WARNING: {report['stand_in']['fixture_miss']} request(s) to recorded hosts had no matching fixture and were answered synthetically")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -1,240 +1,1167 @@
 import os
 import sys
+import math
 import json
-import requests
-import feedparser
+import asyncio
+import aiohttp
 import time
 import datetime
-import pytz
 import random
 import logging
 import socket
-from eventregistry import EventRegistry, QueryArticlesIter, QueryItems
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from deep_translator import GoogleTranslator
+import hashlib
+import urllib.parse
+import re
+import html
+import email.utils
+import zlib
+import io
+import bisect
+import threading
+import contextlib
+import heapq
+import itertools
+import signal
+import sqlite3
+import argparse
+import numpy as np
+# Provider SDKs (eventregistry, deep_translator, googlenewsdecoder), feedparser and pytz are imported
+# where they are first used, so runs that never reach a source or stage do not pay for loading them.
 
 # =========================
 # CONFIG & LOGGING
 # =========================
-# Set global socket timeout to prevent indefinite hangs in libraries like feedparser
+# Set global socket timeout to prevent indefinite hangs in blocking libraries (translator, EventRegistry)
 socket.setdefaulttimeout(30)
-logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
-
-# API Keys from environment
-NEWS_API_KEY = os.getenv("NEWS_API_KEY")
-NEWSDATA_KEY = os.getenv("NEWSDATA_KEY")
-THENEWS_KEY = os.getenv("THENEWS_KEY")
-GNEWS_KEY = os.getenv("GNEWS_KEY")
-NEWS_API_AI_KEY = os.getenv("NEWS_API_AI_KEY")
+LOG_FORMAT = "%(asctime)s [%(levelname)s] %(message)s"  # Configured in main(), so importing this module has no side effects
+
+# API Keys from environment (news provider keys are named per source in sources.json via "key_env")
 GEMINI_KEY = os.getenv("GEMINI_KEY")
 
 # Settings
-MAX_ITEMS_PER_SOURCE = 30
+MAX_ITEMS_PER_SOURCE = 30  # Default per-source "limit" (sources.json; "limit": null for none); items past it are never mapped
+GEMINI_RPM = float(os.getenv("GEMINI_RPM", "10"))  # Shared Gemini request budget (requests/minute)
+GEMINI_BURST = int(os.getenv("GEMINI_BURST", "2"))
+GEMINI_CHUNK_SIZE = int(os.getenv("GEMINI_CHUNK_SIZE", "5"))  # Articles per enrichment call
+GEMINI_CHUNK_OUTPUT_TOKENS = 2048
+GEMINI_SUMMARY_OUTPUT_TOKENS = 1024
+HTTP_MAX_IN_FLIGHT = int(os.getenv("HTTP_MAX_IN_FLIGHT", "16"))  # Global cap on concurrent requests
+HTTP_PER_HOST = int(os.getenv("HTTP_PER_HOST", "4"))  # Connection cap per host (news.google.com etc.)
+HTTP_TIMEOUT = 20
+HTTP_MIN_TIMEOUT = 5
+RSS_RETRY_BASE = 1.5  # Exponential backoff base (seconds) for RSS retries
+ADAPTIVE_TIMEOUT_FACTOR = 6  # RSS timeout = EWMA latency x factor, clamped to [HTTP_MIN_TIMEOUT, caller timeout]
+CIRCUIT_FAILURES = 3  # Consecutive failures (across runs) that open a host's circuit
+CIRCUIT_COOLDOWN = 15 * 60
+CIRCUIT_MAX_COOLDOWN = 6 * 3600
+QUOTA_BURST = 2  # Calls allowed ahead of the even daily pace
+LAST_RESPONSE_TTL = 2 * 86400
+RUN_RETRY_BUDGET = int(os.getenv("RUN_RETRY_BUDGET", "20"))  # Retries allowed per run across all providers
+RUN_TIME_BUDGET = float(os.getenv("RUN_TIME_BUDGET", "600"))  # No retry may start once a run has used this many seconds
+REPLAY_URL = os.getenv("NEWS_REPLAY_URL")  # Route every HTTP request to a local stand-in (see bench_news.py)
+RECORD_DIR = os.getenv("NEWS_RECORD_DIR")  # Save every HTTP response as a replay fixture
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-SESSION = requests.Session()
-SESSION.headers.update({
+SOURCES_FILE = os.getenv("NEWS_SOURCES_FILE", os.path.join(BASE_DIR, "sources.json"))  # Categories, sources and quotas
+CACHE_DIR = os.getenv("NEWS_CACHE_DIR", os.path.join(BASE_DIR, ".cache"))  # Persistent caches between runs (not published)
+METRICS_FILE = os.getenv("METRICS_FILE", os.path.join(CACHE_DIR, "metrics.jsonl"))  # One JSON line per run
+CHANGED_ARTIFACTS_FILE = os.getenv("CHANGED_ARTIFACTS_FILE", os.path.join(CACHE_DIR, "changed_artifacts.txt"))  # Read by the publish step
+FEED_CACHE_TTL = 7 * 86400  # Drop validators for feeds we have not fetched in a week
+ENRICH_CACHE_TTL = 48 * 3600  # Reuse Gemini enrichment of an article for two days
+OUTPUT_WINDOW_HOURS = float(os.getenv("OUTPUT_WINDOW_HOURS", "24"))  # Pages show enriched articles seen in this window
+ARTICLES_PER_PAGE = 15
+STORE_RETENTION_DAYS = 7
+TRANSLATION_TTL = 30 * 86400
+RESOLVED_URL_TTL = 30 * 86400
+RESOLVE_CONCURRENCY = 8  # Parallel Google News link decodes
+RANK_DIMS = 4096  # Hashed TF-IDF feature space for rank_articles
+RECENCY_HALF_LIFE_HOURS = 12
+SHINGLE_SIZE = 4
+MINHASH_PERMS = 64
+LSH_BANDS = 16  # 16 bands x 4 rows: titles with ~50%+ shingle overlap become candidates
+NEAR_DUP_THRESHOLD = 0.6  # Estimated Jaccard similarity at which two titles are the same story
+RANK_POOL_SIZE = int(os.getenv("RANK_POOL_SIZE", "100"))  # Candidates per category kept for the full rerank (pages use 15)
+ARTICLE_DESC_CHARS = 300  # Descriptions are cut to this on ingest; prompts use 250, ranking 300
+TRANSLATE_BATCH_CHARS = 4500  # Google Translate rejects requests over 5000 characters
+LANG_CODES = {"zh": "zh-CN", "es": "es"}
+DEFAULT_HEADERS = {
     "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
     "Accept-Language": "en-US,en;q=0.9",
     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8"
-})
+}
+RSS_HEADERS = {
+    "Accept": "application/rss+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Referer": "https://www.google.com/"
+}
 
 # Output Folder (save to the root of the cron-main folder)
 OUTPUT_DIR = os.path.dirname(BASE_DIR)
-# Log absolute path for verification
-logging.info(f"Base Directory: {BASE_DIR}")
-logging.info(f"Target Output Directory: {OUTPUT_DIR}")
-
-# Category Definitions (Strictly unified to /news folder as requested)
-CATEGORIES = {
-    "global": {"name": "Headline News", "zh": "世界头条", "file": "topnews", "folder": "news"},
-    "market": {"name": "Finance", "zh": "财经头条", "file": "money", "folder": "news"},
-    "ai": {"name": "AI Analysis", "zh": "AI深度分析", "file": "ainews", "folder": "news"},
-    "charlotte": {"name": "Local Life", "zh": "本地生活", "file": "local", "folder": "news"}
-}
+
+# Source registry: category -> page settings, ranking keywords (rank_articles) and the list of sources
+# to fetch, each {type, name, url, params, key_env, weight, limit}. Daily provider quotas live alongside.
+with open(SOURCES_FILE, encoding="utf-8") as f:
+    SOURCES = json.load(f)
+CATEGORIES = SOURCES["categories"]  # All output strictly unified to /news folder
+PROVIDER_QUOTAS = SOURCES.get("quotas", {})
+
+# =========================
+# METRICS
+# =========================
+
+class Metrics:
+    """Per-run instrumentation: latency histograms per stage/provider plus counters (bytes, items, retries,
+    429s, cache hits/misses). One JSON line per run is appended to METRICS_FILE. Thread-safe, since
+    translation and URL decoding run in worker threads."""
+    BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.started = time.time()
+            self.timings = {}
+            self.counters = {}
+
+    def observe(self, name, seconds):
+        with self.lock:
+            t = self.timings.get(name)
+            if t is None:
+                t = self.timings[name] = {"count": 0, "sum": 0.0, "max": 0.0, "buckets": [0] * (len(self.BUCKETS) + 1)}
+            t["count"] += 1
+            t["sum"] += seconds
+            t["max"] = max(t["max"], seconds)
+            t["buckets"][bisect.bisect_left(self.BUCKETS, seconds)] += 1
+
+    def incr(self, name, value=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def cache(self, name, hit, n=1):
+        self.incr(f"cache.{name}.{'hit' if hit else 'miss'}", n)
+
+    @contextlib.contextmanager
+    def timer(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started)
+
+    def snapshot(self, **extra):
+        with self.lock:
+            timings = {k: dict(v, sum=round(v["sum"], 4), max=round(v["max"], 4)) for k, v in self.timings.items()}
+            counters = dict(self.counters)
+        ratios = {}
+        for key in counters:
+            if key.startswith("cache.") and key.endswith(".hit"):
+                name = key[len("cache."):-len(".hit")]
+                hits, misses = counters[key], counters.get(f"cache.{name}.miss", 0)
+                ratios[name] = round(hits / (hits + misses), 4) if hits + misses else None
+        return dict(extra, started=datetime.datetime.fromtimestamp(self.started, datetime.timezone.utc).isoformat(),
+                    duration=round(time.time() - self.started, 3), buckets=list(self.BUCKETS),
+                    timings=timings, counters=counters, cache_hit_ratio=ratios)
+
+    def write(self, **extra):
+        try:
+            os.makedirs(os.path.dirname(METRICS_FILE) or ".", exist_ok=True)
+            with open(METRICS_FILE, "a", encoding="utf-8") as f:
+                f.write(json.dumps(self.snapshot(**extra), ensure_ascii=False) + "\n")
+        except OSError as e:
+            logging.error(f"Failed to write metrics: {e}")
+
+METRICS = Metrics()
+
+# =========================
+# ASYNC FETCH ENGINE
+# =========================
+
+class HttpError(Exception):
+    def __init__(self, status, url):
+        super().__init__(f"HTTP {status} for {url}")
+        self.status = status
+
+class HttpResponse:
+    __slots__ = ("status", "headers", "body", "url")
+
+    def __init__(self, status, headers, body, url):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.url = url
+
+    @property
+    def text(self):
+        return self.body.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.body)
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            raise HttpError(self.status, self.url)
+
+class FetchEngine:
+    """One aiohttp connection pool shared by every fetcher and provider.
+
+    TCPConnector caps connections per host, and a semaphore caps requests in flight
+    across all categories, so adding feeds adds coroutines rather than threads.
+    """
+    def __init__(self, max_in_flight=HTTP_MAX_IN_FLIGHT, per_host=HTTP_PER_HOST):
+        self.max_in_flight = max_in_flight
+        self.per_host = per_host
+        self.session = None
+        self.slots = None
+        self.loop = None
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        if self.session is None or self.session.closed or self.loop is not loop:
+            connector = aiohttp.TCPConnector(limit=self.max_in_flight, limit_per_host=self.per_host, ttl_dns_cache=300)
+            self.session = aiohttp.ClientSession(connector=connector, headers=DEFAULT_HEADERS)
+            self.slots = asyncio.Semaphore(self.max_in_flight)
+            self.loop = loop
+        return self
+
+    async def close(self):
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+    async def request(self, method, url, params=None, headers=None, json_body=None, timeout=HTTP_TIMEOUT, adaptive=False):
+        """adaptive=True lets the host's latency EWMA shorten timeout (see ProviderHealth.timeout);
+        otherwise the caller's timeout is used as given."""
+        await self.start()
+        parts = urllib.parse.urlsplit(url)
+        host = parts.netloc
+        target = f"{REPLAY_URL.rstrip('/')}/{host}{parts.path}?{parts.query}" if REPLAY_URL else url
+        trial = HEALTH.check(host)
+        if RECORD_DIR and headers:
+            # Record full bodies: a 304 fixture would replay as an empty feed against a cold cache
+            headers = {k: v for k, v in headers.items() if k not in ("If-None-Match", "If-Modified-Since")}
+        if adaptive:
+            timeout = HEALTH.timeout(host, timeout)
+        try:
+            async with self.slots:
+                started = time.perf_counter()
+                try:
+                    async with self.session.request(method, target, params=params, headers=headers, json=json_body,
+                                                    timeout=aiohttp.ClientTimeout(total=timeout)) as r:
+                        body = await r.read()
+                except Exception:
+                    METRICS.incr(f"http.{host}.errors")
+                    HEALTH.record(host, False, time.perf_counter() - started)
+                    raise
+                finally:
+                    METRICS.observe(f"http.{host}", time.perf_counter() - started)
+                # 429 is quota, not health; dead feeds usually show up as 5xx/403/404/410
+                HEALTH.record(host, r.status < 500 and r.status not in (403, 404, 410), time.perf_counter() - started)
+                METRICS.incr(f"http.{host}.requests")
+                METRICS.incr(f"http.{host}.bytes", len(body))
+                METRICS.incr(f"http.{host}.status_{r.status}")
+                response = HttpResponse(r.status, r.headers, body, url)
+                if RECORD_DIR and r.status != 304:
+                    record_fixture(method, url, params, json_body, response)
+                return response
+        finally:
+            if trial:
+                HEALTH.end_trial(host)
+
+SECRET_PARAMS = {"apikey", "api_token", "token", "key"}
+FIXTURE_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+PROMPT_DATE_RE = re.compile(r"(Current Date: )\d{4}-\d{2}-\d{2}")
+
+def redact_url(url):
+    """url without its API-key query parameters (SECRET_PARAMS)."""
+    parts = urllib.parse.urlsplit(url)
+    query = [(k, v) for k, v in urllib.parse.parse_qsl(parts.query, keep_blank_values=True) if k.lower() not in SECRET_PARAMS]
+    return urllib.parse.urlunsplit(parts._replace(query=urllib.parse.urlencode(query)))
+
+def fixture_key(method, url, params=None, body=None):
+    """Stable name for a request (API keys stripped) shared by record mode and the replay stand-in.
+    JSON request bodies are part of the key, so each Gemini prompt gets its own fixture."""
+    parts = urllib.parse.urlsplit(url)
+    query = urllib.parse.parse_qsl(parts.query, keep_blank_values=True) + [(k, str(v)) for k, v in (params or {}).items()]
+    query = sorted((k, v) for k, v in query if k.lower() not in SECRET_PARAMS)
+    raw = f"{method.upper()} {parts.netloc}{parts.path}?{urllib.parse.urlencode(query)}"
+    if body is not None:
+        # Prompts carry today's date; without normalizing it a Gemini fixture only matches on the day it was recorded
+        raw += " " + PROMPT_DATE_RE.sub(r"\1<date>", json.dumps(body, sort_keys=True, ensure_ascii=False))
+    return f"{parts.netloc.replace('.', '_')}-{hashlib.sha1(raw.encode('utf-8')).hexdigest()[:12]}"
+
+def record_fixture(method, url, params, body, response):
+    os.makedirs(RECORD_DIR, exist_ok=True)
+    fixture = {"method": method, "url": redact_url(url), "status": response.status,
+               "headers": {h: response.headers[h] for h in FIXTURE_HEADERS if h in response.headers},
+               "body": response.text}
+    with open(os.path.join(RECORD_DIR, f"{fixture_key(method, url, params, body)}.json"), "w", encoding="utf-8") as f:
+        json.dump(fixture, f, ensure_ascii=False)
+
+ENGINE = FetchEngine()
 
 # =========================
 # UTILITIES
 # =========================
 
-def safe_get(url, params=None, name="API"):
+async def safe_get(url, params=None, name="API", quota=None):
+    # Quota-limited providers only get called while their pacing window allows; otherwise reuse the last response
+    key = fixture_key("GET", url, params)
+    if quota and not QUOTAS.try_acquire(quota):
+        cached = LAST_RESPONSES.get(key)
+        logging.info(f"{name}: {quota} quota window spent, {'serving last response' if cached else 'no cached response'}")
+        return cached or {}
     try:
-        r = SESSION.get(url, params=params, timeout=20)
+        with METRICS.timer(f"source.{name}"):
+            r = await ENGINE.request("GET", url, params=params)
         r.raise_for_status()
-        return r.json()
+        data = r.json()
+        if quota:
+            LAST_RESPONSES.set(key, data)
+        return data
     except Exception as e:
+        METRICS.incr(f"source.{name}.failures")
         logging.error(f"{name} request failed: {e}")
+        if quota:
+            if isinstance(e, CircuitOpenError):
+                QUOTAS.release(quota)
+            elif isinstance(e, HttpError) and e.status == 429:
+                QUOTAS.exhaust(quota)
+            return LAST_RESPONSES.get(key) or {}
         return {}
 
-def dedupe(articles):
-    seen_urls = set()
-    seen_titles = set()
-    unique = []
-    for a in articles:
-        url = a.get("url", "").strip().lower()
-        title = " ".join((a.get("title") or "").split()).lower()
-        if url and url not in seen_urls and title and title not in seen_titles:
-            seen_urls.add(url)
-            seen_titles.add(title)
-            unique.append(a)
-    return unique
+class JsonCache:
+    """Small JSON-file key/value store persisted between runs. Entries older than ttl (seconds) are ignored and evicted on save.
+
+    Thread-safe: translation workers (asyncio.to_thread) share TRANSLATION_MEMORY, so loading, writes
+    and saves are serialized by a lock; two first readers can never load separate dicts.
+    """
+    def __init__(self, name, ttl=None):
+        self.path = os.path.join(CACHE_DIR, f"{name}.json")
+        self.ttl = ttl
+        self.data = None
+        self.dirty = False
+        self.lock = threading.RLock()
+        CACHES.append(self)
+
+    def load(self):
+        with self.lock:
+            if self.data is None:
+                try:
+                    with open(self.path, encoding="utf-8") as f:
+                        self.data = json.load(f)
+                except (OSError, ValueError):
+                    self.data = {}
+            return self.data
+
+    def expired(self, entry, now=None):
+        return bool(self.ttl) and (now or time.time()) - entry.get("ts", 0) > self.ttl
+
+    def get(self, key):
+        entry = self.load().get(key)
+        if entry is None or self.expired(entry):
+            return None
+        return entry["value"]
+
+    def set(self, key, value):
+        with self.lock:
+            self.load()[key] = {"ts": time.time(), "value": value}
+            self.dirty = True
+
+    def save(self):
+        with self.lock:
+            if not self.dirty: return
+            now = time.time()
+            data = {k: v for k, v in self.load().items() if not self.expired(v, now)}
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+            self.data, self.dirty = data, False
+
+CACHES = []
+
+def save_caches():
+    for cache in CACHES:
+        try:
+            cache.save()
+        except Exception as e:
+            logging.error(f"Failed to save cache {cache.path}: {e}")
+
+FEED_CACHE = JsonCache("feeds", ttl=FEED_CACHE_TTL)  # url -> {etag, last_modified, articles}
+SUMMARY_CACHE = JsonCache("summaries", ttl=ENRICH_CACHE_TTL)  # category + article set -> summary/insight/clusters
+TRANSLATION_MEMORY = JsonCache("translations", ttl=TRANSLATION_TTL)  # "lang:source text" -> translation
+URL_CACHE = JsonCache("resolved_urls", ttl=RESOLVED_URL_TTL)  # Google News link -> publisher URL
+SCHEDULE = JsonCache("schedule")  # category -> start time of its last daemon cycle
+
+class CircuitOpenError(Exception):
+    def __init__(self, host, until):
+        super().__init__(f"circuit open for {host} until {datetime.datetime.fromtimestamp(until).strftime('%H:%M:%S')}")
+        self.host = host
+
+class ProviderHealth:
+    """Per-host health registry persisted across runs.
+
+    Tracks consecutive failures and an EWMA of latency per host. After CIRCUIT_FAILURES consecutive
+    failures the circuit opens and the host is skipped for a cooldown that doubles on every further
+    failure (up to CIRCUIT_MAX_COOLDOWN). Once the cooldown passes one trial request is let through
+    (half-open) while other requests to the host keep failing fast; success closes the circuit. The
+    latency EWMA also tightens the timeout of requests that opt in (RSS fetches) for hosts that are
+    normally fast.
+    """
+    def __init__(self):
+        self.cache = JsonCache("provider_health", ttl=30 * 86400)
+        self.trials = set()  # Hosts with a half-open trial request in flight (this process)
+
+    def state(self, host):
+        return self.cache.get(host) or {"consecutive": 0, "latency": None, "open_until": 0}
+
+    def check(self, host):
+        """Raises CircuitOpenError while host's circuit is open. Returns True when the caller is the
+        half-open trial, which must be ended with end_trial()."""
+        s = self.state(host)
+        if s["open_until"] > time.time() or (s["open_until"] and host in self.trials):
+            METRICS.incr(f"circuit.{host}.skipped")
+            raise CircuitOpenError(host, s["open_until"])
+        if s["open_until"]:
+            self.trials.add(host)
+            METRICS.incr(f"circuit.{host}.trials")
+            return True
+        return False
+
+    def end_trial(self, host):
+        self.trials.discard(host)
+
+    def timeout(self, host, default):
+        latency = self.state(host)["latency"]
+        if latency is None:
+            return default
+        return min(default, max(HTTP_MIN_TIMEOUT, latency * ADAPTIVE_TIMEOUT_FACTOR))
+
+    def record(self, host, ok, seconds):
+        s = dict(self.state(host))
+        s["latency"] = seconds if s["latency"] is None else 0.3 * seconds + 0.7 * s["latency"]
+        if ok:
+            if s["consecutive"] >= CIRCUIT_FAILURES:
+                logging.info(f"Circuit closed for {host}")
+            s["consecutive"], s["open_until"] = 0, 0
+        else:
+            s["consecutive"] += 1
+            if s["consecutive"] >= CIRCUIT_FAILURES:
+                cooldown = min(CIRCUIT_COOLDOWN * 2 ** (s["consecutive"] - CIRCUIT_FAILURES), CIRCUIT_MAX_COOLDOWN)
+                s["open_until"] = time.time() + cooldown
+                METRICS.incr(f"circuit.{host}.opened")
+                logging.warning(f"Circuit opened for {host} after {s['consecutive']} consecutive failures (cooldown {cooldown / 60:.0f} min)")
+        self.cache.set(host, s)
+
+HEALTH = ProviderHealth()
+
+class RunBudget:
+    """Retry/backoff allowance for one run, shared by all providers, so one bad upstream can't stretch the run."""
+    def __init__(self, max_retries, max_seconds):
+        self.max_retries = max_retries
+        self.max_seconds = max_seconds
+        self.reset()
+
+    def reset(self):
+        self.started = time.monotonic()
+        self.retries_left = self.max_retries
+
+    def remaining(self):
+        return max(0.0, self.max_seconds - (time.monotonic() - self.started))
+
+    def take_retry(self, wait):
+        """Consumes one retry if a retry after `wait` seconds still fits the run budget."""
+        if self.retries_left <= 0 or wait >= self.remaining():
+            METRICS.incr("budget.retries_denied")
+            return False
+        self.retries_left -= 1
+        return True
+
+RETRY_BUDGET = RunBudget(RUN_RETRY_BUDGET, RUN_TIME_BUDGET)
+
+def backoff(attempt, base):
+    return base * (2 ** attempt) + random.random() * base
+
+class QuotaScheduler:
+    """Daily API quota tracking persisted across runs (UTC days) in the article store's quota table.
+
+    A provider's calls are spread evenly over the day: by time t it may have used at most
+    per_day x (elapsed fraction of the day) + QUOTA_BURST calls. Once that pacing window (or a
+    lifetime "total", for one-time token grants) is spent, callers serve the provider's last
+    successful response from LAST_RESPONSES instead of calling it. Every check-and-increment is one
+    conditional UPDATE, so cron runs sharing a key at the same minute cannot under-count.
+    """
+    def __init__(self, quotas):
+        self.quotas = quotas
+
+    def db(self):
+        return STORE.connect()
+
+    def allowed(self, provider, now=None):
+        now = now or time.time()
+        quota = self.quotas[provider]
+        elapsed = (now % 86400) / 86400
+        return min(quota["per_day"], int(quota["per_day"] * elapsed) + QUOTA_BURST)
+
+    def try_acquire(self, provider, now=None):
+        now = now or time.time()
+        day = time.strftime("%Y-%m-%d", time.gmtime(now))
+        total = self.quotas[provider].get("total")
+        db = self.db()
+        with db:
+            db.execute("INSERT OR IGNORE INTO quota (provider, day) VALUES (?, ?)", (provider, day))
+            # A new UTC day resets "used" in the same statement that takes the call
+            acquired = db.execute("""
+                UPDATE quota SET used = CASE WHEN day = :day THEN used + 1 ELSE 1 END, day = :day, total_used = total_used + 1
+                WHERE provider = :provider AND CASE WHEN day = :day THEN used ELSE 0 END < :allowed
+                  AND (:total IS NULL OR total_used < :total)
+            """, {"provider": provider, "day": day, "allowed": self.allowed(provider, now), "total": total}).rowcount
+        if not acquired:
+            METRICS.incr(f"quota.{provider}.deferred")
+            return False
+        METRICS.incr(f"quota.{provider}.used")
+        return True
+
+    def release(self, provider):
+        """Gives back a call that was never sent (e.g. the circuit was open)."""
+        db = self.db()
+        with db:
+            db.execute("UPDATE quota SET used = MAX(0, used - 1), total_used = MAX(0, total_used - 1) WHERE provider = ?", (provider,))
+
+    def exhaust(self, provider):
+        """Provider answered 429: treat today's quota as spent."""
+        day = time.strftime("%Y-%m-%d", time.gmtime())
+        db = self.db()
+        with db:
+            db.execute("INSERT OR IGNORE INTO quota (provider, day) VALUES (?, ?)", (provider, day))
+            db.execute("UPDATE quota SET used = CASE WHEN day = :day THEN MAX(used, :cap) ELSE :cap END, day = :day WHERE provider = :provider",
+                       {"provider": provider, "day": day, "cap": self.quotas[provider]["per_day"]})
+        logging.warning(f"Quota for {provider} exhausted for today (HTTP 429); serving cached responses until UTC midnight")
+
+QUOTAS = QuotaScheduler(PROVIDER_QUOTAS)
+LAST_RESPONSES = JsonCache("last_responses", ttl=LAST_RESPONSE_TTL)  # fixture_key -> last successful provider payload
+
+class TokenBucket:
+    """Asyncio token bucket used to pace calls to a shared upstream (e.g. Gemini)."""
+    def __init__(self, rate_per_sec, capacity):
+        self.rate = rate_per_sec
+        self.capacity = max(1, capacity)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = None
+        self.loop = None
+
+    async def acquire(self):
+        loop = asyncio.get_running_loop()
+        if self.lock is None or self.loop is not loop:
+            self.lock, self.loop = asyncio.Lock(), loop
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+GEMINI_LIMITER = TokenBucket(GEMINI_RPM / 60.0, GEMINI_BURST)
+
+TRACKING_PARAMS = {"fbclid", "gclid", "ocid", "cmpid", "ref", "smid"}
+
+# Fixed-seed hash family so MinHash signatures are stable between runs
+MINHASH_PRIME = np.uint64((1 << 61) - 1)
+_rng = np.random.default_rng(1729)
+MINHASH_A = _rng.integers(1, 1 << 32, size=MINHASH_PERMS, dtype=np.uint64)
+MINHASH_B = _rng.integers(0, 1 << 32, size=MINHASH_PERMS, dtype=np.uint64)
+
+def normalize_url(url):
+    """Lower-cases scheme/host and drops fragments, tracking params and trailing slashes so one story has one key."""
+    parts = urllib.parse.urlsplit((url or "").strip())
+    query = [(k, v) for k, v in urllib.parse.parse_qsl(parts.query, keep_blank_values=True) if not (k.lower().startswith("utm_") or k.lower() in TRACKING_PARAMS)]
+    path = parts.path.rstrip("/") or "/"
+    return urllib.parse.urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urllib.parse.urlencode(query), ""))
+
+def article_key(a):
+    title = " ".join((a.get("title") or "").split()).lower()
+    return hashlib.sha1(f"{normalize_url(a.get('url'))}|{title}".encode("utf-8")).hexdigest()
+
+TITLE_SUFFIX_RE = re.compile(r"\s+[-|\u2013\u2014]\s+([^-|\u2013\u2014]{2,40})$")  # " - Moneycontrol.com", " | Reuters"
+DOMAIN_RE = re.compile(r"^[\w-]+(\.[\w-]+)*\.[a-z]{2,}$", re.I)
+PUBLISHER_CONNECTORS = {"of", "the", "and", "for", "on", "in", "de", "&"}
+MIN_STRIPPED_WORDS = 4  # A capitalized suffix is only dropped if the rest can still be matched on
+
+def strip_publisher(title):
+    """title without a trailing publisher suffix. A suffix counts as a publisher when it is a domain
+    ("Moneycontrol.com"), or a short capitalized name ("AP News", "Times of India") after a title of at
+    least MIN_STRIPPED_WORDS words; "Panthers beat Saints - recap" keeps its suffix."""
+    m = TITLE_SUFFIX_RE.search(title)
+    if not m:
+        return title
+    suffix, rest = m.group(1).strip(), title[:m.start()]
+    if DOMAIN_RE.match(suffix):
+        return rest
+    words = suffix.split()
+    named = len(words) <= 5 and all(w[0].isupper() or w[0].isdigit() or w.lower() in PUBLISHER_CONNECTORS for w in words) \
+        and any(w[0].isupper() for w in words)
+    return rest if named and len(rest.split()) >= MIN_STRIPPED_WORDS else title
+
+def title_shingles(title):
+    """Character 4-grams of a title with its publisher suffix stripped; robust to small wording differences.
+    Words are Unicode \\w runs, so CJK titles shingle on their own characters; a title with no word
+    characters at all (emoji only) falls back to its whitespace-normalized self rather than the empty string."""
+    stripped = strip_publisher(title).casefold()
+    text = " ".join(re.findall(r"\w+", stripped)) or " ".join(stripped.split())
+    if len(text) <= SHINGLE_SIZE:
+        return {text}
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+class NearDupIndex:
+    """MinHash + LSH index over article titles.
+
+    Each title gets a MINHASH_PERMS signature split into LSH_BANDS bands; only articles sharing
+    a band bucket are compared, so inserting n articles stays close to linear instead of n^2.
+    Entries can be removed again (remove), which CandidatePool uses to keep the index bounded.
+    """
+    def __init__(self, threshold=NEAR_DUP_THRESHOLD):
+        self.threshold = threshold
+        self.rows = MINHASH_PERMS // LSH_BANDS
+        self.buckets = {}  # (band, band bytes) -> [entry id]
+        self.entries = {}  # entry id -> (item, signature, bucket keys)
+        self.next_id = 0
+
+    def signature(self, shingles):
+        h = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+        return ((MINHASH_A[:, None] * h[None, :] + MINHASH_B[:, None]) % MINHASH_PRIME).min(axis=1)
+
+    def lookup(self, title):
+        """(indexed near-duplicate item or None, probe); pass probe to insert() to index the title."""
+        sig = self.signature(title_shingles(title))
+        keys = [(b, sig[b * self.rows:(b + 1) * self.rows].tobytes()) for b in range(LSH_BANDS)]
+        checked = set()
+        for key in keys:
+            for j in self.buckets.get(key, ()):
+                if j in checked: continue
+                checked.add(j)
+                if np.mean(self.entries[j][1] == sig) >= self.threshold:
+                    return self.entries[j][0], (sig, keys)
+        return None, (sig, keys)
+
+    def insert(self, item, probe, entry_id=None):
+        if entry_id is None:
+            entry_id, self.next_id = self.next_id, self.next_id + 1
+        sig, keys = probe
+        self.entries[entry_id] = (item, sig, keys)
+        for key in keys:
+            self.buckets.setdefault(key, []).append(entry_id)
+        return entry_id
+
+    def add(self, item, title):
+        """Returns the already-indexed near-duplicate of item, or None after indexing item."""
+        dup, probe = self.lookup(title)
+        if dup is None:
+            self.insert(item, probe)
+        return dup
+
+    def remove(self, entry_id):
+        _, _, keys = self.entries.pop(entry_id)
+        for key in keys:
+            bucket = self.buckets[key]
+            bucket.remove(entry_id)
+            if not bucket:
+                del self.buckets[key]
+
+STOPWORDS = set("a an the and or of to in on for at by with from as is are was were be been it its this that after over new says said will can how why what who".split())
+
+def strip_html(text):
+    return " ".join(html.unescape(re.sub(r"<[^>]+>", " ", text or "")).split())
+
+def tokenize(text):
+    return [w for w in re.findall(r"[a-z0-9&]+", (text or "").lower()) if w not in STOPWORDS and len(w) > 1]
+
+class Article:
+    """Compact candidate record built as soon as a source item is read.
+
+    The description is HTML-stripped and cut to ARTICLE_DESC_CHARS here, so full RSS summaries and
+    EventRegistry bodies are never held past ingest. get()/[] mirror the dict access used downstream.
+    """
+    __slots__ = ("title", "url", "description", "source", "published_at", "source_weight", "coverage", "rank_score")
+    FIELDS = ("title", "url", "description", "source", "published_at")  # What caches persist
+
+    def __init__(self, title, url, description="", source="", published_at=""):
+        self.title = title
+        self.url = url
+        self.description = strip_html(description)[:ARTICLE_DESC_CHARS]
+        self.source = source
+        self.published_at = published_at
+        self.source_weight = 1.0
+        self.coverage = 1
+        self.rank_score = None
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d.get("title"), d.get("url"), d.get("description"), d.get("source"), d.get("published_at"))
+
+    def to_dict(self):
+        return {f: getattr(self, f) for f in self.FIELDS}
+
+    def get(self, name, default=None):
+        value = getattr(self, name, None) if name in self.__slots__ else None
+        return default if value is None else value
+
+    def __getitem__(self, name):
+        if name not in self.__slots__:
+            raise KeyError(name)
+        return getattr(self, name)
+
+    def __setitem__(self, name, value):
+        setattr(self, name, value)
+
+def parse_published(value):
+    """Epoch seconds from RFC 822 (RSS) or ISO 8601 (APIs) timestamps; None when missing/unparseable."""
+    if not value: return None
+    try:
+        dt = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        try:
+            dt = datetime.datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=datetime.timezone.utc)
+    return dt.timestamp()
+
+def rank_articles(articles, cat_id, now=None):
+    """Orders the deduped pool by local relevance so the Gemini cut keeps the best candidates.
+
+    Hashed TF-IDF vectors (one NumPy matrix for the whole pool) give keyword relevance to the
+    category profile and centrality (how many other stories cover the same topic); these are
+    blended with multi-provider coverage, recency and a per-source weight.
+    """
+    n = len(articles)
+    if n <= 1: return list(articles)
+    now = now or time.time()
+
+    docs = [tokenize(f"{a.get('title', '')} {strip_html(a.get('description'))[:300]}") for a in articles]
+    X = np.zeros((n, RANK_DIMS), dtype=np.float32)
+    rows = np.repeat(np.arange(n), [len(d) for d in docs])
+    cols = np.fromiter((zlib.crc32(w.encode("utf-8")) % RANK_DIMS for d in docs for w in d), dtype=np.int64, count=len(rows))
+    np.add.at(X, (rows, cols), 1.0)
+    idf = np.log((1 + n) / (1 + (X > 0).sum(axis=0))) + 1
+    X = np.log1p(X) * idf
+    X /= np.maximum(np.linalg.norm(X, axis=1, keepdims=True), 1e-9)
+
+    q = np.zeros(RANK_DIMS, dtype=np.float32)
+    for w in tokenize(CATEGORIES.get(cat_id, {}).get("keywords", "")):
+        q[zlib.crc32(w.encode("utf-8")) % RANK_DIMS] = 1.0
+    q *= idf
+    relevance = X @ (q / max(np.linalg.norm(q), 1e-9))
+    centrality = np.clip((X @ X.sum(axis=0) - 1) / (n - 1), 0, None)
+
+    coverage = np.log1p(np.array([a.get("coverage", 1) - 1 for a in articles], dtype=np.float32))
+    published = np.array([parse_published(a.get("published_at")) or np.nan for a in articles], dtype=np.float64)
+    age_hours = np.clip((now - published) / 3600, 0, None)
+    recency = np.where(np.isnan(age_hours), 0.5, 0.5 ** (age_hours / RECENCY_HALF_LIFE_HOURS))
+    weights = np.array([a.get("source_weight", 1.0) for a in articles], dtype=np.float32)
+
+    def unit(v):
+        top = v.max()
+        return v / top if top > 0 else v
+    scores = weights * (0.35 * unit(relevance) + 0.25 * unit(centrality) + 0.2 * unit(coverage) + 0.2 * recency)
+
+    order = np.argsort(-scores, kind="stable")
+    for i in order:
+        articles[i]["rank_score"] = round(float(scores[i]), 4)
+    return [articles[i] for i in order]
+
+class CandidatePool:
+    """Streaming ingest for one category: dedupes and keeps a bounded top-K as articles arrive.
+
+    Exact URL duplicates and near-duplicate titles (same wire story from several providers) of a
+    kept candidate are dropped on arrival; the first copy wins and its coverage counts the providers
+    carrying it. A cheap per-article score (keyword overlap, recency, source weight) decides which
+    RANK_POOL_SIZE candidates stay in a min-heap. Only kept candidates are in the URL set and the
+    MinHash index, and evicted ones are removed from both, so pool memory is bounded by the capacity
+    rather than the feed pool. ranked() runs the full rank_articles rerank (centrality, coverage) on
+    the survivors only.
+    """
+    def __init__(self, cat_id, capacity=RANK_POOL_SIZE, now=None):
+        self.cat_id = cat_id
+        self.capacity = capacity
+        self.now = now or time.time()
+        self.keywords = set(tokenize(CATEGORIES.get(cat_id, {}).get("keywords", "")))
+        self.urls = {}  # normalized url -> seq, kept candidates only
+        self.index = NearDupIndex()  # Holds seq numbers of kept candidates
+        self.live = {}  # seq -> (Article, normalized url) still in the heap
+        self.heap = []  # (prescore, -seq, seq): the root is the weakest, latest candidate
+        self.seq = 0
+        self.fetched = 0
+        self.unique = 0  # Arrivals that were not a duplicate of a kept candidate
+
+    def prescore(self, a):
+        words = set(tokenize(f"{a.title} {a.description}"))
+        relevance = min(1.0, len(words & self.keywords) / 3)
+        published = parse_published(a.published_at)
+        recency = 0.5 if published is None else 0.5 ** (max(0.0, self.now - published) / 3600 / RECENCY_HALF_LIFE_HOURS)
+        return a.source_weight * (0.6 * relevance + 0.4 * recency)
+
+    def add(self, a):
+        self.fetched += 1
+        if not a.url or not a.title:
+            return
+        url = normalize_url(a.url)
+        if url in self.urls:
+            return
+        dup, probe = self.index.lookup(" ".join(a.title.split()))
+        if dup is not None:
+            self.live[dup][0].coverage += 1
+            return
+        self.unique += 1
+        seq, self.seq = self.seq, self.seq + 1
+        entry = (self.prescore(a), -seq, seq)
+        if len(self.heap) < self.capacity:
+            heapq.heappush(self.heap, entry)
+        elif entry > self.heap[0]:
+            evicted = heapq.heapreplace(self.heap, entry)[2]
+            del self.urls[self.live.pop(evicted)[1]]
+            self.index.remove(evicted)
+        else:
+            return
+        self.live[seq] = (a, url)
+        self.urls[url] = seq
+        self.index.insert(seq, probe, seq)
+
+    def ranked(self):
+        """Survivors in arrival order, reranked by rank_articles."""
+        return rank_articles([self.live[seq][0] for seq in sorted(self.live)], self.cat_id, now=self.now)
 
 # =========================
-# FETCH FUNCTIONS (Parallelized internally)
+# ARTICLE STORE (SQLite)
 # =========================
 
-def fetch_rss(url, source_name, retries=2):
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-        "Accept": "application/rss+xml,application/xml;q=0.9,*/*;q=0.8",
-        "Accept-Language": "en-US,en;q=0.9",
-        "Referer": "https://www.google.com/"
-    }
+class ArticleStore:
+    """Append/upsert history of every candidate article per category, with its Gemini enrichment.
+
+    Rows are keyed by (category, article_key); page output is a query over a rolling window,
+    so history lives on disk instead of in memory. The same database holds the state that concurrent
+    runs must share (provider quota counters, the artifact manifest), updated row by row in SQL so
+    parallel cron processes do not overwrite each other.
+    """
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS articles (
+        category TEXT NOT NULL,
+        key TEXT NOT NULL,
+        url TEXT NOT NULL,
+        source TEXT,
+        title TEXT,
+        description TEXT,
+        published_at REAL,
+        first_seen REAL NOT NULL,
+        last_seen REAL NOT NULL,
+        rank_score REAL,
+        enrichment TEXT,
+        enriched_at REAL,
+        fallback INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (category, key)
+    );
+    CREATE INDEX IF NOT EXISTS idx_articles_key ON articles (key);
+    CREATE INDEX IF NOT EXISTS idx_articles_published ON articles (category, published_at);
+    CREATE INDEX IF NOT EXISTS idx_articles_last_seen ON articles (category, last_seen);
+    CREATE TABLE IF NOT EXISTS quota (
+        provider TEXT PRIMARY KEY,
+        day TEXT NOT NULL,
+        used INTEGER NOT NULL DEFAULT 0,
+        total_used INTEGER NOT NULL DEFAULT 0
+    );
+    CREATE TABLE IF NOT EXISTS artifacts (
+        path TEXT PRIMARY KEY,
+        digest TEXT NOT NULL
+    );
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.db = None
+
+    def connect(self):
+        if self.db is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self.db = sqlite3.connect(self.path, check_same_thread=False)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.executescript(self.SCHEMA)
+        return self.db
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+    def upsert(self, category, articles, now=None):
+        now = now or time.time()
+        rows = [(category, article_key(a), a.get("url"), a.get("source"), a.get("title"), strip_html(a.get("description"))[:500],
+                 parse_published(a.get("published_at")), now, now, a.get("rank_score")) for a in articles if a.get("url")]
+        db = self.connect()
+        with db:
+            db.executemany("""
+                INSERT INTO articles (category, key, url, source, title, description, published_at, first_seen, last_seen, rank_score)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (category, key) DO UPDATE SET last_seen = excluded.last_seen, rank_score = excluded.rank_score
+            """, rows)
+
+    def enrichment(self, category, keys, max_age):
+        """Returns {key: enrichment} for keys enriched by Gemini (not fallbacks) within max_age seconds."""
+        if not keys: return {}
+        marks = ",".join("?" * len(keys))
+        cur = self.connect().execute(
+            f"SELECT key, enrichment FROM articles WHERE category = ? AND key IN ({marks}) AND fallback = 0 AND enriched_at >= ?",
+            [category, *keys, time.time() - max_age])
+        known = ((key, clean_item(json.loads(data))) for key, data in cur if data)
+        return {key: item for key, item in known if item}  # Rows stored before validation may be bad; re-enrich those
+
+    def set_enrichment(self, category, key, item, fallback=False):
+        db = self.connect()
+        with db:
+            db.execute("UPDATE articles SET enrichment = ?, enriched_at = ?, fallback = ? WHERE category = ? AND key = ?",
+                       (json.dumps({f: item.get(f) for f in ENRICHED_FIELDS}, ensure_ascii=False), time.time(), int(fallback), category, key))
+
+    def window(self, category, since, limit=500):
+        """Enriched articles of a category seen since `since` (epoch seconds), newest first."""
+        cur = self.connect().execute("""
+            SELECT url, source, enrichment, first_seen FROM articles
+            WHERE category = ? AND last_seen >= ? AND enrichment IS NOT NULL
+            ORDER BY last_seen DESC LIMIT ?
+        """, (category, since, limit))
+        return [dict(json.loads(data), url=url, source=source, first_seen=first_seen) for url, source, data, first_seen in cur]
+
+    def prune(self, before):
+        db = self.connect()
+        with db:
+            deleted = db.execute("DELETE FROM articles WHERE last_seen < ?", (before,)).rowcount
+        if deleted:
+            logging.info(f"Article store: pruned {deleted} rows older than {STORE_RETENTION_DAYS} days")
+
+STORE = ArticleStore(os.path.join(CACHE_DIR, "articles.db"))
+
+def select_page(category, now=None):
+    """Rolling-window page for a category: stored articles from the last OUTPUT_WINDOW_HOURS,
+    ordered by Gemini score decayed by age, near-duplicates removed."""
+    now = now or time.time()
+    rows = [r for r in STORE.window(category, now - OUTPUT_WINDOW_HOURS * 3600) if clean_item(r)]
+    for r in rows:
+        age_hours = max(0.0, (now - r["first_seen"]) / 3600)
+        r["_order"] = float(r.get("score") or 0) * 0.5 ** (age_hours / RECENCY_HALF_LIFE_HOURS)
+    rows.sort(key=lambda r: r["_order"], reverse=True)
+    index, page = NearDupIndex(), []
+    for r in rows:
+        if index.add(r, r.get("title") or r["url"]) is None:
+            page.append(r)
+            if len(page) == ARTICLES_PER_PAGE: break
+    for i, r in enumerate(page):
+        r.pop("_order", None)
+        r.pop("first_seen", None)
+        r["id"] = i
+    return page
+
+# =========================
+# FETCH FUNCTIONS (Concurrent on the shared ENGINE)
+# =========================
+
+async def fetch_rss(url, source_name, retries=2):
+    # Conditional GET: send the validators from the last successful fetch; a 304 reuses the cached entries
+    cached = FEED_CACHE.get(url)
+    headers = dict(RSS_HEADERS)
+    if cached:
+        if cached.get("etag"): headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"): headers["If-Modified-Since"] = cached["last_modified"]
     for attempt in range(retries + 1):
         try:
             logging.info(f"Fetching RSS: {source_name} from {url} (Attempt {attempt+1})")
-            response = SESSION.get(url, timeout=20, headers=headers, stream=False)
+            with METRICS.timer(f"source.{source_name}"):
+                response = await ENGINE.request("GET", url, headers=headers, adaptive=True)
+            if response.status == 304 and cached:
+                METRICS.cache("feeds", True)
+                METRICS.incr(f"source.{source_name}.items", len(cached["articles"]))
+                FEED_CACHE.set(url, cached)
+                logging.info(f"RSS {source_name} not modified, reusing {len(cached['articles'])} cached articles")
+                return [Article.from_dict(a) for a in cached["articles"]]
             response.raise_for_status()
             
-            feed = feedparser.parse(response.content)
-            articles = []
-            for entry in feed.entries:
-                articles.append({
-                    "title": entry.title,
-                    "description": (entry.get("summary", "") or entry.get("description", "")),
-                    "url": entry.link,
-                    "source": source_name,
-                    "published_at": entry.get("published", "")
-                })
+            METRICS.cache("feeds", False)
+            import feedparser  # Only needed when a feed actually changed (not on 304s)
+            with METRICS.timer("stage.parse_rss"):
+                feed = feedparser.parse(response.body)
+            articles = [Article(entry.title, entry.link, entry.get("summary", "") or entry.get("description", ""), source_name, entry.get("published", ""))
+                        for entry in feed.entries]
+            del feed  # Drop the parsed feed (full summaries) before anything else runs
+            if response.headers.get("ETag") or response.headers.get("Last-Modified"):
+                FEED_CACHE.set(url, {"etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified"), "articles": [a.to_dict() for a in articles]})
+            METRICS.incr(f"source.{source_name}.items", len(articles))
             logging.info(f"Fetched {len(articles)} articles from {source_name}")
             return articles
         except Exception as e:
-            if attempt < retries:
-                logging.warning(f"RSS {source_name} attempt {attempt+1} failed ({e}), retrying...")
-                time.sleep(3)
-            else:
-                logging.error(f"RSS {source_name} failed after {retries+1} attempts: {e}")
-                return []
+            wait = backoff(attempt, RSS_RETRY_BASE)
+            if attempt < retries and not isinstance(e, CircuitOpenError) and RETRY_BUDGET.take_retry(wait):
+                METRICS.incr("retries.rss")
+                logging.warning(f"RSS {source_name} attempt {attempt+1} failed ({e}), retrying in {wait:.1f}s...")
+                await asyncio.sleep(wait)
+                continue
+            METRICS.incr(f"source.{source_name}.failures")
+            logging.error(f"RSS {source_name} failed after {attempt+1} attempts: {e}")
+            if cached:
+                logging.info(f"RSS {source_name}: serving {len(cached['articles'])} stale cached articles")
+                return [Article.from_dict(a) for a in cached["articles"]]
+            return []
     return []
 
-def fetch_top_news():
-    articles = []
-    tasks = []
-    with ThreadPoolExecutor(max_workers=5) as pool:
-        if NEWS_API_KEY:
-            tasks.append(pool.submit(safe_get, "https://newsapi.org/v2/top-headlines", {"apiKey": NEWS_API_KEY, "language": "en", "pageSize": 30}, "NewsAPI_Global"))
-        if NEWSDATA_KEY:
-            tasks.append(pool.submit(safe_get, "https://newsdata.io/api/1/news", {"apikey": NEWSDATA_KEY, "language": "en", "category": "top"}, "NewsData_Global"))
-        
-        # Add Google News Top Headlines RSS as a robust fallback
-        google_rss = "https://news.google.com/rss?hl=en-US&gl=US&ceid=US:en"
-        tasks.append(pool.submit(fetch_rss, google_rss, "Google News (Global)"))
-
-        for future in as_completed(tasks):
-            res = future.result()
-            if isinstance(res, list): # RSS
-                articles.extend(res)
-            elif isinstance(res, dict):
-                if "articles" in res: # NewsAPI
-                    articles.extend([{"title": a["title"], "url": a["url"], "description": a.get("description", ""), "source": a["source"]["name"]} for a in res.get("articles", [])])
-                elif "results" in res: # NewsData
-                    articles.extend([{"title": a["title"], "url": a["link"], "description": a.get("description", ""), "source": a.get("source_id", "NewsData")} for a in res.get("results", [])])
-    return articles
+# Response shapes of the keyed JSON providers: where the API key goes, which field holds the
+# article list, and how one item maps onto an Article.
+def map_newsapi(a):
+    return Article(a["title"], a["url"], a.get("description"), a["source"]["name"], a.get("publishedAt", ""))
+
+def map_newsdata(a):
+    return Article(a["title"], a["link"], a.get("description"), a.get("source_id", "NewsData"), a.get("pubDate", ""))
 
-def fetch_market_news():
+def map_thenewsapi(a):
+    return Article(a["title"], a["url"], a.get("description"), a.get("source", "TheNewsAPI"), a.get("published_at", ""))
+
+API_SHAPES = {
+    "newsapi": {"key_param": "apiKey", "items": "articles", "map": map_newsapi},
+    "newsdata": {"key_param": "apikey", "items": "results", "map": map_newsdata},
+    "thenewsapi": {"key_param": "api_token", "items": "data", "map": map_thenewsapi},
+    "gnews": {"key_param": "token", "items": "articles", "map": map_newsapi},  # Same article shape as NewsAPI
+}
+
+def fetch_event_registry(api_key, params):
+    # EventRegistry SDK is blocking; it runs in a worker thread (see fetch_event_registry_paced)
     articles = []
-    query = "stock market OR finance OR crypto OR equities OR economy OR inflation"
-    tasks = []
-    with ThreadPoolExecutor(max_workers=5) as pool:
-        if NEWS_API_KEY:
-            tasks.append(pool.submit(safe_get, "https://newsapi.org/v2/everything", {"apiKey": NEWS_API_KEY, "q": query, "language": "en", "pageSize": 30}, "NewsAPI_Market"))
-        if THENEWS_KEY:
-            tasks.append(pool.submit(safe_get, "https://api.thenewsapi.com/v1/news/all", {"api_token": THENEWS_KEY, "language": "en", "search": "finance stocks", "limit": 5}, "TheNewsAPI_Market"))
-        
-        # Add Google News Market RSS as a robust fallback
-        google_rss = "https://news.google.com/rss/search?q=stock+market+finance+economy&hl=en-US&gl=US&ceid=US:en"
-        tasks.append(pool.submit(fetch_rss, google_rss, "Google News (Market)"))
-
-        for future in as_completed(tasks):
-            res = future.result()
-            if isinstance(res, list): # RSS
-                articles.extend(res)
-            elif isinstance(res, dict):
-                if "articles" in res:
-                    articles.extend([{"title": a["title"], "url": a["url"], "description": a.get("description", ""), "source": a["source"]["name"]} for a in res.get("articles", [])])
-                elif "data" in res:
-                    articles.extend([{"title": a["title"], "url": a["url"], "description": a.get("description", ""), "source": a.get("source", "TheNewsAPI")} for a in res.get("data", [])])
+    try:
+        from eventregistry import EventRegistry, QueryArticlesIter
+        er = EventRegistry(apiKey=api_key)
+        q = QueryArticlesIter(conceptUri=er.getConceptUri(params.get("concept", "Artificial intelligence")), lang=params.get("lang", "eng"))
+        for a in q.execQuery(er, sortBy="rel", maxItems=params.get("maxItems", 25)):
+            articles.append({"title": a["title"], "url": a["url"], "description": a.get("body", "")[:ARTICLE_DESC_CHARS], "source": "EventRegistry", "published_at": a.get("dateTime", "")})
+    except Exception as e: logging.error(f"EventRegistry failed: {e}")
     return articles
 
-def fetch_ai_news_rich():
-    articles = []
-    if NEWS_API_AI_KEY:
+async def fetch_event_registry_paced(src, api_key):
+    key = f"eventregistry:{src['name']}:{json.dumps(src.get('params', {}), sort_keys=True)}"
+    if not QUOTAS.try_acquire("eventregistry"):
+        cached = LAST_RESPONSES.get(key) or []
+        logging.info(f"{src['name']}: token pace spent, serving {len(cached)} cached articles")
+        return cached
+    articles = await asyncio.to_thread(fetch_event_registry, api_key, src.get("params", {}))
+    if articles:
+        LAST_RESPONSES.set(key, articles)
+        return articles
+    return LAST_RESPONSES.get(key) or []
+
+def map_items(items, mapper, name):
+    for a in items:
         try:
-            er = EventRegistry(apiKey=NEWS_API_AI_KEY)
-            q = QueryArticlesIter(conceptUri=er.getConceptUri("Artificial intelligence"), lang="eng")
-            for a in q.execQuery(er, sortBy="rel", maxItems=25):
-                articles.append({"title": a["title"], "url": a["url"], "description": a.get("body", "")[:350], "source": "EventRegistry"})
-        except Exception as e: logging.error(f"EventRegistry failed: {e}")
-
-    ai_feeds = {
-        "TechCrunch": "https://techcrunch.com/category/artificial-intelligence/feed/",
-        "VentureBeat": "https://venturebeat.com/category/ai/feed/",
-        "DeepLearning.AI": "https://www.deeplearning.ai/the-batch/rss/",
-        "TLDR AI": "https://tldr.tech/ai/rss"
-    }
-    with ThreadPoolExecutor(max_workers=4) as pool:
-        futures = [pool.submit(fetch_rss, url, name) for name, url in ai_feeds.items()]
-        for future in as_completed(futures):
-            articles.extend(future.result())
-    return articles
+            yield mapper(a)
+        except (KeyError, TypeError):
+            METRICS.incr(f"source.{name}.malformed")
 
-def fetch_charlotte_news_rich():
-    articles = []
-    local_feeds = {
-        "WCNC": "https://www.wcnc.com/feeds/syndication/rss/news/local",
-        "WCCB": "https://www.wccbcharlotte.com/feed/"
-    }
-    with ThreadPoolExecutor(max_workers=5) as pool:
-        futures = [pool.submit(fetch_rss, url, name) for name, url in local_feeds.items()]
-        # Add Google News as a robust fallback/supplement (increase count to ensure plenty of inputs)
-        google_rss = "https://news.google.com/rss/search?q=Charlotte+NC+news&hl=en-US&gl=US&ceid=US:en"
-        futures.append(pool.submit(fetch_rss, google_rss, "Google News (Charlotte)"))
-        
-        if GNEWS_KEY:
-            futures.append(pool.submit(safe_get, "https://gnews.io/api/v4/search", {"token": GNEWS_KEY, "q": "Charlotte NC", "lang": "en", "max": 10}, "GNews_Charlotte"))
-        
-        for future in as_completed(futures):
-            res = future.result()
-            if isinstance(res, list): # RSS
-                articles.extend(res)
-            elif isinstance(res, dict) and "articles" in res: # GNews
-                articles.extend([{"title": a["title"], "url": a["url"], "description": a.get("description", ""), "source": a["source"]["name"]} for a in res.get("articles", [])])
-    return articles
+def weighted(articles, limit, weight):
+    # Items past the limit are never mapped
+    for a in itertools.islice(articles, limit):
+        a.source_weight = weight
+        yield a
+
+async def fetch_source(src):
+    """Fetches one registry source; returns a lazy iterator of its Articles (at most its "limit").
+    Sources whose key is not configured yield nothing."""
+    kind, name = src["type"], src["name"]
+    api_key = os.getenv(src["key_env"]) if src.get("key_env") else None
+    if src.get("key_env") and not api_key:
+        return iter(())
+    if kind == "rss":
+        articles = await fetch_rss(src["url"], name)
+    elif kind == "eventregistry":
+        articles = map(Article.from_dict, await fetch_event_registry_paced(src, api_key))
+    elif kind in API_SHAPES:
+        shape = API_SHAPES[kind]
+        params = dict(src.get("params", {}))
+        if api_key:
+            params[shape["key_param"]] = api_key
+        res = await safe_get(src["url"], params, name, quota=kind if kind in PROVIDER_QUOTAS else None)
+        items = res.get(shape["items"]) if isinstance(res, dict) else None
+        articles = map_items(items or [], shape["map"], name)
+    else:
+        logging.error(f"{name}: unknown source type {kind!r}")
+        return iter(())
+    return weighted(articles, src.get("limit", MAX_ITEMS_PER_SOURCE), src.get("weight", 1.0))
+
+async def stream_category(cat_id):
+    """Yields a category's Articles as each source completes, while all sources fetch concurrently.
+
+    Finished sources are handed over through a queue rather than kept as task results, so each
+    response is mapped into the pool and released as soon as it has been consumed.
+    """
+    queue = asyncio.Queue()
+
+    async def produce(src):
+        try:
+            await queue.put(await fetch_source(src))
+        except Exception as e:
+            logging.error(f"Source {src.get('name')} failed: {e}")
+            await queue.put(iter(()))
+
+    sources = CATEGORIES[cat_id].get("sources", [])
+    tasks = [asyncio.ensure_future(produce(src)) for src in sources]
+    try:
+        for _ in sources:
+            articles = await queue.get()
+            for a in articles:
+                yield a
+            articles = None
+    finally:
+        for task in tasks:
+            task.cancel()
+
+async def ingest_category(cat_id):
+    """Fetch stage: streams every source of a category into a CandidatePool."""
+    pool = CandidatePool(cat_id)
+    async for a in stream_category(cat_id):
+        pool.add(a)
+    return pool
 
 # =========================
 # AI PROCESSING (GEMINI) - BATCHED
 # =========================
 
-def call_gemini(prompt, max_retries=3):
+async def call_gemini(prompt, max_retries=3, max_output_tokens=8192):
     if not GEMINI_KEY: return None
     url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={GEMINI_KEY}"
     body = {
         "contents": [{"parts": [{"text": prompt}]}],
         "generationConfig": {
             "response_mime_type": "application/json",
-            "max_output_tokens": 8192,
+            "max_output_tokens": max_output_tokens,
             "temperature": 0.1
         }
     }
     for attempt in range(max_retries):
         try:
-            # Use SESSION for better connection pooling
-            r = SESSION.post(url, json=body, timeout=120)
-            if r.status_code == 429:
-                # More aggressive backoff with jitter
-                wait_time = (5 * (2 ** attempt)) + (random.random() * 5)
-                logging.warning(f"Gemini rate limit (429) on attempt {attempt+1}. Retrying in {wait_time:.2f}s...")
-                time.sleep(wait_time)
-                continue
+            # Every attempt (including retries) draws from the shared Gemini budget
+            with METRICS.timer("gemini.wait"):
+                await GEMINI_LIMITER.acquire()
+            with METRICS.timer("gemini.call"):
+                r = await ENGINE.request("POST", url, json_body=body, timeout=120)
+            if attempt:
+                METRICS.incr("retries.gemini")
+            if r.status == 429:
+                METRICS.incr("gemini.status_429")
+                # More aggressive backoff with jitter, as long as the run's retry budget allows it
+                wait_time = backoff(attempt, 5)
+                if attempt < max_retries - 1 and RETRY_BUDGET.take_retry(wait_time):
+                    logging.warning(f"Gemini rate limit (429) on attempt {attempt+1}. Retrying in {wait_time:.2f}s...")
+                    await asyncio.sleep(wait_time)
+                    continue
+                logging.warning(f"Gemini rate limit (429) on attempt {attempt+1}. Giving up (retries or run budget exhausted).")
+                return None
                 
             r.raise_for_status()
             data = r.json()
@@ -247,24 +1174,51 @@ def call_gemini(prompt, max_retries=3):
             return json.loads(text)
         except Exception as e:
             resp_content = r.text if 'r' in locals() else "No response"
+            METRICS.incr("gemini.failures")
             logging.error(f"Gemini call attempt {attempt+1} failed ({len(resp_content)} chars): {e}")
-            if attempt < max_retries - 1:
-                time.sleep(5) # Base wait between non-429 failures
+            if attempt < max_retries - 1 and not isinstance(e, CircuitOpenError) and RETRY_BUDGET.take_retry(5):
+                await asyncio.sleep(5) # Base wait between non-429 failures
                 continue
             return None
     return None
 
-def ai_process_bundle(category_id, raw_list, category_name):
-    """Performs ENRICHMENT (EN only) in one Gemini call to minimize payload size."""
-    if not raw_list: return None
-    
-    # Process EXACTLY 15 articles
-    articles_to_process = raw_list[:15]
-    logging.info(f"Enriching {category_name} with Gemini (Articles: {len(articles_to_process)})...")
-    
-    # Payload optimization
+ENRICHED_FIELDS = ("score", "sentiment", "impact", "title", "description", "why_matters")
+
+SENTIMENTS = {"positive": "Positive", "neutral": "Neutral", "negative": "Negative"}
+IMPACTS = {"high": "High", "medium": "Medium", "med": "Medium", "low": "Low"}
+
+def clean_item(item):
+    """Validated copy of one Gemini article item (numeric score in 0-10, known sentiment/impact, a title and
+    string text fields), or None. Stored enrichment is served for the whole output window, so bad items must not get in."""
+    try:
+        score = float(item["score"])
+        sentiment = SENTIMENTS[str(item["sentiment"]).strip().lower()]
+        impact = IMPACTS[str(item["impact"]).strip().lower()]
+    except (KeyError, TypeError, ValueError):
+        return None
+    if not math.isfinite(score):
+        return None
+    score = min(10.0, max(0.0, score))
+    text = {f: item.get(f) for f in ("title", "description", "why_matters")}
+    if not all(isinstance(v, str) for v in text.values()) or not text["title"].strip():
+        return None
+    return dict(text, id=item.get("id"), score=score, sentiment=sentiment, impact=impact)
+
+def fallback_item(i, a):
+    return {
+        "id": i,
+        "score": 5.0,
+        "sentiment": "Neutral",
+        "impact": "Medium",
+        "title": a.get("title", "Untitled"),
+        "description": (a.get("description") or a.get("desc") or "")[:250],
+        "why_matters": "Details available in the source article."
+    }
+
+async def enrich_chunk(category_name, chunk):
+    """Map step: enriches one small chunk of (id, article) pairs. Returns {id: item}, empty on failure."""
     input_data = []
-    for i, a in enumerate(articles_to_process):
+    for i, a in chunk:
         desc = (a.get("description") or a.get("desc") or "")[:250]
         input_data.append({"id": i, "title": a["title"], "desc": desc})
 
@@ -275,70 +1229,190 @@ def ai_process_bundle(category_id, raw_list, category_name):
     Articles: {json.dumps(input_data)}
     
     Requirements:
-    1. Process EXACTLY {len(articles_to_process)} articles.
+    1. Process EXACTLY {len(input_data)} articles, keeping each "id".
     2. For EACH article, generate:
        - score (0-10.0), sentiment (Positive/Neutral/Negative), impact (High/Med/Low).
        - title: Clear, professional headline.
        - description: Succinct summary (MAX 250 characters).
        - why_matters: Deep insight (MAX 120 characters).
-    3. Provide Category Summary (3 sentences) and Landscape Insight (1 sentence).
-    4. Provide 3-4 trending clusters.
     
     CRITICAL: 
     - Return ONLY valid JSON.
     - language: English.
     
     Structure: {{
-      "summary": "...", 
-      "insight": "...", 
-      "clusters": [...], 
       "articles": [{{ "id": idx, "score": float, "sentiment": "...", "impact": "...", "title": "...", "description": "...", "why_matters": "..." }}]
     }}
     """
+    res = await call_gemini(prompt, max_output_tokens=GEMINI_CHUNK_OUTPUT_TOKENS)
+    wanted = {i for i, _ in chunk}
+    if not isinstance(res, dict):
+        return {}
+    items = {}
+    for item in res.get("articles", []):
+        if not isinstance(item, dict) or item.get("id") not in wanted:
+            continue
+        clean = clean_item(item)
+        if clean is None:
+            # Left out, so the article is stored as a fallback and retried next run
+            METRICS.incr("gemini.invalid_items")
+            logging.warning(f"Discarding invalid Gemini item for article {item.get('id')}: {json.dumps(item)[:200]}")
+            continue
+        items[item["id"]] = clean
+    return items
+
+async def summarize_category(category_name, headlines):
+    """Reduce step: one lightweight call for the category summary/insight/clusters over all selected headlines."""
+    prompt = f"""
+    Task: Briefing for {category_name} news.
+    Current Date: {datetime.datetime.now().strftime('%Y-%m-%d')}
+    
+    Headlines: {json.dumps(headlines)}
     
-    res = call_gemini(prompt)
-    if not res or "articles" not in res:
-        logging.warning(f"Enrichment skipped for {category_id} (Gemini Rate Limit). Using raw data fallback.")
-        res = {
+    Requirements:
+    1. Provide Category Summary (3 sentences) and Landscape Insight (1 sentence).
+    2. Provide 3-4 trending clusters.
+    
+    CRITICAL: 
+    - Return ONLY valid JSON.
+    - language: English.
+    
+    Structure: {{ "summary": "...", "insight": "...", "clusters": [...] }}
+    """
+    res = await call_gemini(prompt, max_output_tokens=GEMINI_SUMMARY_OUTPUT_TOKENS)
+    if isinstance(res, dict) and res.get("summary"):
+        return {"summary": res["summary"], "insight": res.get("insight", ""), "clusters": res.get("clusters", [])}
+    return None
+
+async def ai_process_bundle(category_id, raw_list, category_name):
+    """Performs ENRICHMENT (EN only) as map-reduce: articles without stored enrichment are enriched in small
+    concurrent chunks (paced by GEMINI_LIMITER); a failed chunk only degrades its own articles. The page is a
+    rolling-window query over STORE, and one separate call then summarizes exactly the headlines on that page."""
+    if not raw_list: return None
+    
+    # Process EXACTLY 15 articles (raw_list is already ordered by rank_articles)
+    articles_to_process = raw_list[:15]
+    keys = [article_key(a) for a in articles_to_process]
+    known = STORE.enrichment(category_id, keys, ENRICH_CACHE_TTL)
+    enriched = {i: dict(known[key], id=i) for i, key in enumerate(keys) if key in known}
+    misses = [(i, a) for i, a in enumerate(articles_to_process) if i not in enriched]
+    chunks = [misses[k:k + GEMINI_CHUNK_SIZE] for k in range(0, len(misses), GEMINI_CHUNK_SIZE)]
+    METRICS.cache("enrichment", True, len(enriched))
+    METRICS.cache("enrichment", False, len(misses))
+    logging.info(f"Enriching {category_name} with Gemini (Articles: {len(articles_to_process)}, cached: {len(enriched)}, new: {len(misses)} in {len(chunks)} chunks)...")
+
+    results = await asyncio.gather(*(enrich_chunk(category_name, chunk) for chunk in chunks))
+
+    failed = 0
+    for chunk, items in zip(chunks, results):
+        for i, _ in chunk:
+            item = items.get(i)
+            if item is None:
+                failed += 1
+                # Stored so the article can still be shown, but flagged so the next run retries it
+                STORE.set_enrichment(category_id, keys[i], fallback_item(i, articles_to_process[i]), fallback=True)
+                continue
+            enriched[i] = item
+            STORE.set_enrichment(category_id, keys[i], item)
+    if failed:
+        logging.warning(f"Enrichment incomplete for {category_id}: {failed} article(s) using raw data fallback.")
+
+    # Page = rolling window over the article store (this run's articles plus earlier ones still in the window)
+    page = select_page(category_id)
+    if not page:
+        page = [enriched.get(i) or fallback_item(i, a) for i, a in enumerate(articles_to_process)]
+        for item in page:
+            item["url"] = articles_to_process[item["id"]].get("url")
+            item["source"] = articles_to_process[item["id"]].get("source")
+
+    # Reduce step over the page itself, so the brief never describes stories that are not shown
+    headlines = [a["title"] for a in page]
+    summary_key = f"{category_id}:" + hashlib.sha1("|".join(sorted(headlines)).encode("utf-8")).hexdigest()
+    overview = SUMMARY_CACHE.get(summary_key)
+    METRICS.cache("summaries", bool(overview))
+    if not overview:
+        overview = await summarize_category(category_name, headlines)
+        if overview:
+            SUMMARY_CACHE.set(summary_key, overview)
+    if not overview:
+        logging.warning(f"Summary skipped for {category_id} (Gemini Rate Limit). Using fallback summary.")
+        overview = {
             "summary": f"Latest updates for {category_name}.",
             "insight": "AI enrichment temporarily unavailable.",
-            "clusters": ["News Updates"],
-            "articles": []
+            "clusters": ["News Updates"]
         }
-        for i, a in enumerate(articles_to_process):
-            res["articles"].append({
-                "id": i,
-                "score": 5.0,
-                "sentiment": "Neutral",
-                "impact": "Medium",
-                "title": a.get("title", "Untitled"),
-                "description": (a.get("description") or a.get("desc") or "")[:250],
-                "why_matters": "Details available in the source article."
-            })
-        
-    # Inject original URLs and sources
-    for item in res.get("articles", []):
-        orig_idx = item.get("id")
-        if orig_idx is not None and orig_idx < len(articles_to_process):
-            item["url"] = articles_to_process[orig_idx].get("url")
-            item["source"] = articles_to_process[orig_idx].get("source")
-            
-    return {"en": res}
+    return {"en": dict(overview, articles=page)}
+
+def translate_batch(translator, batch):
+    """One request for a whole batch (newline-joined); falls back to per-segment calls if the line count comes back different."""
+    if len(batch) > 1:
+        joined = translator.translate("\n".join(batch)) or ""
+        parts = [p.strip() for p in joined.split("\n") if p.strip()]
+        if len(parts) == len(batch):
+            return parts
+        logging.warning(f"Batched translation returned {len(parts)} lines for {len(batch)} segments, retrying one by one")
+    return [translator.translate(t) for t in batch]
+
+def new_translator(target_lang):
+    from deep_translator import GoogleTranslator
+    return GoogleTranslator(source="auto", target=LANG_CODES[target_lang])
+
+def translate_segments(segments, target_lang):
+    """Translates a list of strings, reusing TRANSLATION_MEMORY and packing the misses into as few requests as possible."""
+    out = [None] * len(segments)
+    pending = {}
+    for i, text in enumerate(segments):
+        text = " ".join((text or "").split())  # One line per segment so batches split back cleanly
+        if not text:
+            out[i] = ""
+            continue
+        hit = TRANSLATION_MEMORY.get(f"{target_lang}:{text}")
+        METRICS.cache("translations", hit is not None)
+        if hit is not None:
+            out[i] = hit
+        else:
+            pending.setdefault(text, []).append(i)
+    if not pending:
+        return out
+
+    translator = new_translator(target_lang)
+    batches, batch, size = [], [], 0
+    for text in pending:
+        if batch and size + len(text) + 1 > TRANSLATE_BATCH_CHARS:
+            batches.append(batch)
+            batch, size = [], 0
+        batch.append(text)
+        size += len(text) + 1
+    if batch: batches.append(batch)
+
+    logging.info(f"Translating {len(pending)} new segments into {target_lang} in {len(batches)} requests ({len(segments) - sum(len(v) for v in pending.values())} from memory)")
+    for batch in batches:
+        with METRICS.timer("translate.request"):
+            results = translate_batch(translator, batch)
+        METRICS.incr("translate.requests")
+        for text, translated in zip(batch, results):
+            TRANSLATION_MEMORY.set(f"{target_lang}:{text}", translated)
+            for i in pending[text]:
+                out[i] = translated
+    return out
 
 def translate_bundle(bundle, target_lang):
     """Translates an English bundle into target_lang using Google Translate (Standard/Stable)."""
     if not bundle or "en" not in bundle: return None
     en_data = bundle["en"]
-    lang_code = "zh-CN" if target_lang == "zh" else "es"
     
     logging.info(f"Translating bundle into {target_lang}...")
-    translator = GoogleTranslator(source="auto", target=lang_code)
-    
     try:
+        segments = [en_data["summary"], en_data["insight"]] + list(en_data["clusters"])
+        for a in en_data["articles"]:
+            segments += [a["title"], a["description"], a["why_matters"]]
+        with METRICS.timer(f"stage.translate.{target_lang}"):
+            translated = iter(translate_segments(segments, target_lang))
+
         translated_data = {
-            "summary": translator.translate(en_data["summary"]),
-            "insight": translator.translate(en_data["insight"]),
-            "clusters": [translator.translate(c) for c in en_data["clusters"]],
+            "summary": next(translated),
+            "insight": next(translated),
+            "clusters": [next(translated) for _ in en_data["clusters"]],
             "articles": []
         }
         
@@ -350,9 +1424,9 @@ def translate_bundle(bundle, target_lang):
                 "impact": a["impact"],
                 "url": a["url"],
                 "source": a["source"],
-                "title": translator.translate(a["title"]),
-                "description": translator.translate(a["description"]),
-                "why_matters": translator.translate(a["why_matters"])
+                "title": next(translated),
+                "description": next(translated),
+                "why_matters": next(translated)
             })
         return translated_data
     except Exception as e:
@@ -370,111 +1444,310 @@ def resolve_url(url):
             logging.error(f"Error decoding Google News URL: {e}")
     return url
 
-def generate_html(title, data, category_id, lang):
-    labels = {
-        "en": {"last_updated": "Last Updated", "today_brief": "Today's Brief", "why_matters": "Why this matters", "read_more": "Read More", "sentiment": "Sentiment"},
-        "zh": {"last_updated": "最后更新", "today_brief": "今日简报", "why_matters": "深度见解", "read_more": "阅读全文", "sentiment": "情感倾向"},
-        "es": {"last_updated": "Última actualización", "today_brief": "Resumen de hoy", "why_matters": "Por qué es importante", "read_more": "Leer más", "sentiment": "Sentimiento"}
-    }.get(lang, {"last_updated": "Last Updated", "today_brief": "Today's Brief", "why_matters": "Why this matters", "read_more": "Read More", "sentiment": "Sentiment"})
-    
-    timestamp = datetime.datetime.now(pytz.timezone("US/Eastern")).strftime("%Y-%m-%d %I:%M %p ET")
-    clusters_html = "".join([f'<span class="cluster">#{c}</span>' for c in data.get("clusters", [])])
-    trending_section = f'<div class="trending-container"><span class="trending-title">Trending Themes:</span><div class="clusters">{clusters_html}</div></div>' if clusters_html else ""
-    
-    articles_html = ""
-    for a in data["articles"]:
-        s_color = {"Positive": "#2ecc71", "Neutral": "#95a5a6", "Negative": "#e74c3c"}.get(a["sentiment"], "#95a5a6")
-        
-        # Wrap URL using Google Translate Web Proxy based on language
-        url = a["url"]
-        if lang == "zh":
-            import urllib.parse
-            url = resolve_url(url)
-            url = f"https://translate.google.com/translate?sl=auto&tl=zh-CN&u={urllib.parse.quote(url, safe='')}"
-        elif lang == "es":
-            import urllib.parse
-            url = resolve_url(url)
-            url = f"https://translate.google.com/translate?sl=auto&tl=es&u={urllib.parse.quote(url, safe='')}"
-
-        articles_html += f"""
+async def resolve_urls(urls):
+    """Pre-render stage: decodes every unique Google News link once, concurrently, backed by URL_CACHE. Returns {url: resolved}."""
+    resolved, todo = {}, []
+    for url in set(urls):
+        cached = URL_CACHE.get(url) if "news.google.com" in url else url
+        if cached is not url:
+            METRICS.cache("resolved_urls", bool(cached))
+        if cached:
+            resolved[url] = cached
+        else:
+            todo.append(url)
+    if not todo:
+        return resolved
+
+    logging.info(f"Resolving {len(todo)} Google News URLs ({len(resolved)} cached or direct)...")
+    slots = asyncio.Semaphore(RESOLVE_CONCURRENCY)
+    async def _resolve(url):
+        async with slots:
+            with METRICS.timer("resolve_url.decode"):
+                decoded = await asyncio.to_thread(resolve_url, url)
+        resolved[url] = decoded
+        if decoded != url:
+            URL_CACHE.set(url, decoded)
+    await asyncio.gather(*(_resolve(u) for u in todo))
+    return resolved
+
+# =========================
+# ARTIFACT OUTPUT (atomic, skip-if-unchanged)
+# =========================
+
+class Artifact:
+    """Write handle for one output file. Content streams to a temp file beside the target while being hashed;
+    pieces written with write_volatile() (the "Last Updated" timestamp) are excluded from the hash."""
+    def __init__(self, writer, path):
+        self.writer = writer
+        self.path = path
+        self.tmp = f"{path}.{os.getpid()}.tmp"
+        self.f = open(self.tmp, "w", encoding="utf-8")
+        self.digest = hashlib.sha256()
+
+    def write(self, text):
+        self.f.write(text)
+        self.digest.update(text.encode("utf-8"))
+
+    def write_volatile(self, text):
+        self.f.write(text)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.f.close()
+        if exc_type is None:
+            self.writer.commit(self.path, self.tmp, self.digest.hexdigest())
+        elif os.path.exists(self.tmp):
+            os.remove(self.tmp)
+        return False
+
+class ArtifactWriter:
+    """Publishes outputs via temp file + rename only when their content hash changed, and records what changed.
+    The manifest (path relative to OUTPUT_DIR -> content hash) is the article store's artifacts table."""
+    def __init__(self):
+        self.changed = []
+        self.unchanged = 0
+
+    def open(self, path):
+        return Artifact(self, path)
+
+    def write_text(self, path, text):
+        with self.open(path) as out:
+            out.write(text)
+
+    def commit(self, path, tmp, digest):
+        rel = os.path.relpath(path, OUTPUT_DIR)
+        db = STORE.connect()
+        row = db.execute("SELECT digest FROM artifacts WHERE path = ?", (rel,)).fetchone()
+        if row and row[0] == digest and os.path.exists(path):
+            os.remove(tmp)
+            self.unchanged += 1
+            METRICS.incr("artifacts.unchanged")
+            return
+        os.replace(tmp, path)
+        with db:
+            db.execute("INSERT INTO artifacts (path, digest) VALUES (?, ?) ON CONFLICT (path) DO UPDATE SET digest = excluded.digest", (rel, digest))
+        self.changed.append(rel)
+        METRICS.incr("artifacts.changed")
+
+    def begin_run(self):
+        self.changed, self.unchanged = [], 0
+
+    def report(self):
+        """Writes the changed paths (one per line, relative to OUTPUT_DIR) for the publish step."""
+        logging.info(f"Artifacts: {len(self.changed)} changed, {self.unchanged} unchanged")
+        os.makedirs(os.path.dirname(CHANGED_ARTIFACTS_FILE) or ".", exist_ok=True)
+        with open(CHANGED_ARTIFACTS_FILE, "w", encoding="utf-8") as f:
+            f.write("".join(f"{rel}\n" for rel in sorted(self.changed)))
+
+ARTIFACTS = ArtifactWriter()
+
+# =========================
+# HTML RENDERING (precompiled templates, streamed to disk)
+# =========================
+
+class PageTemplate:
+    """A template split once, at import, into literal chunks and {{field}} names.
+
+    render() streams the pieces straight to a file-like object, so pages are never
+    assembled into one big string.
+    """
+    FIELD_RE = re.compile(r"\{\{(\w+)\}\}")
+
+    def __init__(self, source):
+        parts = self.FIELD_RE.split(source)
+        self.literals = parts[0::2]
+        self.fields = parts[1::2]
+
+    def render(self, out, values, volatile=()):
+        write = out.write
+        for literal, field in zip(self.literals, self.fields):
+            write(literal)
+            (out.write_volatile if field in volatile else write)(values[field])
+        write(self.literals[-1])
+
+NEWS_CSS = """:root { --ios-bg: #F2F2F7; --ios-card: #FFFFFF; --ios-blue: #007AFF; --ios-text: #1C1C1E; --ios-sub: #8E8E93; }
+body { font-family: -apple-system, BlinkMacSystemFont, "SF Pro Display", "Segoe UI", Roboto, Helvetica, Arial, sans-serif; background: var(--ios-bg); color: var(--ios-text); margin: 0; padding: 20px; -webkit-font-smoothing: antialiased; }
+.header { padding: 10px 0 20px 0; }
+.updated { font-size: 11px; color: var(--ios-sub); text-transform: uppercase; font-weight: 700; letter-spacing: 0.5px; margin-bottom: 6px; opacity: 0.8; }
+h1 { font-size: 34px; font-weight: 800; margin: 0; letter-spacing: -1px; }
+.trending-container { margin-top: 15px; background: rgba(0,0,0,0.03); padding: 12px; border-radius: 14px; }
+.trending-title { font-size: 11px; font-weight: 800; color: var(--ios-sub); text-transform: uppercase; display: block; margin-bottom: 8px; }
+.clusters { display: flex; flex-wrap: wrap; gap: 6px; }
+.cluster { background: white; color: var(--ios-blue); padding: 5px 12px; border-radius: 10px; font-size: 11px; font-weight: 700; border: 1px solid rgba(0,122,255,0.1); }
+.brief { background: linear-gradient(145deg, #007AFF, #5856D6); color: white; padding: 24px; border-radius: 24px; margin: 24px 0; box-shadow: 0 12px 24px rgba(0,122,255,0.25); position: relative; overflow: hidden; }
+.brief::before { content: ''; position: absolute; top: -50%; left: -50%; width: 200%; height: 200%; background: radial-gradient(circle, rgba(255,255,255,0.1) 0%, transparent 70%); pointer-events: none; }
+.brief h2 { font-size: 20px; margin-top: 0; margin-bottom: 10px; font-weight: 800; }
+.brief p { font-size: 15px; margin: 0; opacity: 0.95; line-height: 1.5; }
+.brief .divider { height: 1px; background: rgba(255,255,255,0.25); margin: 16px 0; }
+.brief .insight-text { font-size: 14px; font-weight: 500; opacity: 0.9; }
+.card { background: var(--ios-card); border-radius: 20px; padding: 20px; margin-bottom: 20px; box-shadow: 0 5px 15px rgba(0,0,0,0.04); border: 1px solid rgba(0,0,0,0.02); }
+.card-meta { display: flex; justify-content: space-between; align-items: center; margin-bottom: 12px; }
+.impact { font-size: 10px; font-weight: 900; padding: 3px 10px; border-radius: 8px; text-transform: uppercase; letter-spacing: 0.5px; }
+.impact.high { background: #FF3B3015; color: #FF3B30; }
+.impact.medium { background: #FF950015; color: #FF9500; }
+.impact.low { background: #34C75915; color: #34C759; }
+.score { font-weight: 900; color: var(--ios-blue); font-size: 20px; font-variant-numeric: tabular-nums; }
+h3 { font-size: 19px; margin: 0 0 12px 0; line-height: 1.3; font-weight: 700; color: #000; }
+.desc { font-size: 15px; color: #3A3A3C; line-height: 1.5; margin-bottom: 16px; opacity: 0.9; }
+.insight { background: #F2F2F7; padding: 14px; border-radius: 14px; font-size: 14px; border-left: 4px solid var(--ios-blue); line-height: 1.5; font-weight: 500; }
+.card-footer { display: flex; justify-content: space-between; align-items: center; margin-top: 18px; }
+.source { font-size: 12px; color: var(--ios-sub); font-weight: 700; }
+.sentiment-box { font-size: 10px; font-weight: 800; padding: 3px 8px; border-radius: 6px; text-transform: uppercase; }
+.btn-link { background: var(--ios-blue); color: white; text-decoration: none; font-weight: 700; font-size: 12px; padding: 8px 16px; border-radius: 10px; box-shadow: 0 4px 10px rgba(0,122,255,0.2); }
+"""
+STYLESHEET_FILE = "news.css"
+STYLESHEET_HREF = f"{STYLESHEET_FILE}?v={hashlib.sha1(NEWS_CSS.encode('utf-8')).hexdigest()[:8]}"  # Cache-busted on change
+
+PAGE_HEAD = PageTemplate('<!DOCTYPE html><html lang="{{lang}}"><head><meta charset="UTF-8"><meta name="viewport" content="width=device-width, initial-scale=1.0, maximum-scale=1.0, user-scalable=no, viewport-fit=cover">'
+                         '<link rel="stylesheet" href="{{stylesheet}}"></head><body><div class="header"><div class="updated">{{last_updated}}: {{timestamp}}</div>'
+                         '<h1>{{title}}</h1>{{trending}}</div><div class="brief"><h2>{{today_brief}}</h2><p>{{summary}}</p><div class="divider"></div><p class="insight-text">{{insight}}</p></div>')
+TRENDING = PageTemplate('<div class="trending-container"><span class="trending-title">Trending Themes:</span><div class="clusters">{{clusters}}</div></div>')
+CARD = PageTemplate("""
         <div class="card">
-            <div class="card-meta"><span class="impact {a['impact'].lower()}">{a['impact']} Impact</span><span class="score">{a['score']}</span></div>
-            <h3>{a['title']}</h3><p class="desc">{a['description']}</p>
-            <div class="insight"><strong>{labels['why_matters']}:</strong> {a['why_matters']}</div>
+            <div class="card-meta"><span class="impact {{impact_class}}">{{impact}} Impact</span><span class="score">{{score}}</span></div>
+            <h3>{{title}}</h3><p class="desc">{{description}}</p>
+            <div class="insight"><strong>{{why_label}}:</strong> {{why_matters}}</div>
             <div class="card-footer">
-                <span class="source">{a['source']}</span>
-                <span class="sentiment-box" style="background: {s_color}15; color: {s_color}">{labels['sentiment']}: {a['sentiment']}</span>
-                <a href="{url}" class="btn-link" target="_blank" rel="noopener noreferrer">{labels['read_more']} →</a>
+                <span class="source">{{source}}</span>
+                <span class="sentiment-box" style="background: {{s_color}}15; color: {{s_color}}">{{sentiment_label}}: {{sentiment}}</span>
+                <a href="{{url}}" class="btn-link" target="_blank" rel="noopener noreferrer">{{read_more}} →</a>
             </div>
-        </div>"""
+        </div>""")
+PAGE_TAIL = "</body></html>"
+
+PAGE_LABELS = {
+    "en": {"last_updated": "Last Updated", "today_brief": "Today's Brief", "why_matters": "Why this matters", "read_more": "Read More", "sentiment": "Sentiment"},
+    "zh": {"last_updated": "最后更新", "today_brief": "今日简报", "why_matters": "深度见解", "read_more": "阅读全文", "sentiment": "情感倾向"},
+    "es": {"last_updated": "Última actualización", "today_brief": "Resumen de hoy", "why_matters": "Por qué es importante", "read_more": "Leer más", "sentiment": "Sentimiento"}
+}
+SENTIMENT_COLORS = {"Positive": "#2ecc71", "Neutral": "#95a5a6", "Negative": "#e74c3c"}
+LANG_SUFFIXES = {"zh": "_CN", "es": "_ES", "en": ""}
 
-    return f"""<!DOCTYPE html><html lang="{lang}"><head><meta charset="UTF-8"><meta name="viewport" content="width=device-width, initial-scale=1.0, maximum-scale=1.0, user-scalable=no, viewport-fit=cover"><style>:root {{ --ios-bg: #F2F2F7; --ios-card: #FFFFFF; --ios-blue: #007AFF; --ios-text: #1C1C1E; --ios-sub: #8E8E93; }} body {{ font-family: -apple-system, BlinkMacSystemFont, "SF Pro Display", "Segoe UI", Roboto, Helvetica, Arial, sans-serif; background: var(--ios-bg); color: var(--ios-text); margin: 0; padding: 20px; -webkit-font-smoothing: antialiased; }} .header {{ padding: 10px 0 20px 0; }} .updated {{ font-size: 11px; color: var(--ios-sub); text-transform: uppercase; font-weight: 700; letter-spacing: 0.5px; margin-bottom: 6px; opacity: 0.8; }} h1 {{ font-size: 34px; font-weight: 800; margin: 0; letter-spacing: -1px; }} .trending-container {{ margin-top: 15px; background: rgba(0,0,0,0.03); padding: 12px; border-radius: 14px; }} .trending-title {{ font-size: 11px; font-weight: 800; color: var(--ios-sub); text-transform: uppercase; display: block; margin-bottom: 8px; }} .clusters {{ display: flex; flex-wrap: wrap; gap: 6px; }} .cluster {{ background: white; color: var(--ios-blue); padding: 5px 12px; border-radius: 10px; font-size: 11px; font-weight: 700; border: 1px solid rgba(0,122,255,0.1); }} .brief {{ background: linear-gradient(145deg, #007AFF, #5856D6); color: white; padding: 24px; border-radius: 24px; margin: 24px 0; box-shadow: 0 12px 24px rgba(0,122,255,0.25); position: relative; overflow: hidden; }} .brief::before {{ content: ''; position: absolute; top: -50%; left: -50%; width: 200%; height: 200%; background: radial-gradient(circle, rgba(255,255,255,0.1) 0%, transparent 70%); pointer-events: none; }} .brief h2 {{ font-size: 20px; margin-top: 0; margin-bottom: 10px; font-weight: 800; }} .brief p {{ font-size: 15px; margin: 0; opacity: 0.95; line-height: 1.5; }} .brief .divider {{ height: 1px; background: rgba(255,255,255,0.25); margin: 16px 0; }} .brief .insight-text {{ font-size: 14px; font-weight: 500; opacity: 0.9; }} .card {{ background: var(--ios-card); border-radius: 20px; padding: 20px; margin-bottom: 20px; box-shadow: 0 5px 15px rgba(0,0,0,0.04); border: 1px solid rgba(0,0,0,0.02); }} .card-meta {{ display: flex; justify-content: space-between; align-items: center; margin-bottom: 12px; }} .impact {{ font-size: 10px; font-weight: 900; padding: 3px 10px; border-radius: 8px; text-transform: uppercase; letter-spacing: 0.5px; }} .impact.high {{ background: #FF3B3015; color: #FF3B30; }} .impact.medium {{ background: #FF950015; color: #FF9500; }} .impact.low {{ background: #34C75915; color: #34C759; }} .score {{ font-weight: 900; color: var(--ios-blue); font-size: 20px; font-variant-numeric: tabular-nums; }} h3 {{ font-size: 19px; margin: 0 0 12px 0; line-height: 1.3; font-weight: 700; color: #000; }} .desc {{ font-size: 15px; color: #3A3A3C; line-height: 1.5; margin-bottom: 16px; opacity: 0.9; }} .insight {{ background: #F2F2F7; padding: 14px; border-radius: 14px; font-size: 14px; border-left: 4px solid var(--ios-blue); line-height: 1.5; font-weight: 500; }} .card-footer {{ display: flex; justify-content: space-between; align-items: center; margin-top: 18px; }} .source {{ font-size: 12px; color: var(--ios-sub); font-weight: 700; }} .sentiment-box {{ font-size: 10px; font-weight: 800; padding: 3px 8px; border-radius: 6px; text-transform: uppercase; }} .btn-link {{ background: var(--ios-blue); color: white; text-decoration: none; font-weight: 700; font-size: 12px; padding: 8px 16px; border-radius: 10px; box-shadow: 0 4px 10px rgba(0,122,255,0.2); }} </style></head><body><div class="header"><div class="updated">{labels['last_updated']}: {timestamp}</div><h1>{title}</h1>{trending_section}</div><div class="brief"><h2>{labels['today_brief']}</h2><p>{data['summary']}</p><div class="divider"></div><p class="insight-text">{data['insight']}</p></div>{articles_html}</body></html>"""
+def esc(value):
+    return html.escape(str(value if value is not None else ""))
+
+def article_link(a, lang):
+    # Wrap URL using Google Translate Web Proxy based on language (resolved_url is set by the resolve_urls stage)
+    url = a["url"]
+    if lang in LANG_CODES:
+        url = a.get("resolved_url") or url
+        url = f"https://translate.google.com/translate?sl=auto&tl={LANG_CODES[lang]}&u={urllib.parse.quote(url, safe='')}"
+    return url
+
+def render_head(out, title, data, lang, timestamp):
+    labels = PAGE_LABELS.get(lang, PAGE_LABELS["en"])
+    trending = ""
+    if data.get("clusters"):
+        buf = io.StringIO()
+        TRENDING.render(buf, {"clusters": "".join(f'<span class="cluster">#{esc(c)}</span>' for c in data["clusters"])})
+        trending = buf.getvalue()
+    PAGE_HEAD.render(out, {"lang": lang, "stylesheet": STYLESHEET_HREF, "last_updated": labels["last_updated"], "timestamp": timestamp,
+                           "title": esc(title), "trending": trending, "today_brief": labels["today_brief"],
+                           "summary": esc(data["summary"]), "insight": esc(data["insight"])}, volatile=("timestamp",))
+
+def render_card(out, a, lang):
+    labels = PAGE_LABELS.get(lang, PAGE_LABELS["en"])
+    CARD.render(out, {"impact_class": esc(a["impact"]).lower(), "impact": esc(a["impact"]), "score": esc(a["score"]),
+                      "title": esc(a["title"]), "description": esc(a["description"]), "why_label": labels["why_matters"],
+                      "why_matters": esc(a["why_matters"]), "source": esc(a["source"]), "s_color": SENTIMENT_COLORS.get(a["sentiment"], "#95a5a6"),
+                      "sentiment_label": labels["sentiment"], "sentiment": esc(a["sentiment"]), "url": esc(article_link(a, lang)), "read_more": labels["read_more"]})
+
+def write_stylesheet(target_dir):
+    ARTIFACTS.write_text(os.path.join(target_dir, STYLESHEET_FILE), NEWS_CSS)
+
+def render_category(cat_id, config, bundle, target_dir):
+    """Renders every language page of a category in one pass over the articles, streaming each page to its file."""
+    langs = [lang for lang in ("en", "zh", "es") if bundle.get(lang)]
+    import pytz
+    timestamp = datetime.datetime.now(pytz.timezone("US/Eastern")).strftime("%Y-%m-%d %I:%M %p ET")
+    with contextlib.ExitStack() as stack:
+        streams = {lang: stack.enter_context(ARTIFACTS.open(os.path.join(target_dir, f"{config['file']}{LANG_SUFFIXES[lang]}.html"))) for lang in langs}
+        for lang, out in streams.items():
+            render_head(out, bundle[lang].get("title", config["name"]), bundle[lang], lang, timestamp)
+        for i in range(max(len(bundle[lang]["articles"]) for lang in langs)):
+            for lang, out in streams.items():
+                articles = bundle[lang]["articles"]
+                if i < len(articles):
+                    render_card(out, articles[i], lang)
+        for out in streams.values():
+            out.write(PAGE_TAIL)
 
 # =========================
 # MAIN CATEGORY WORKFLOW
 # =========================
 
-def save_files(cat_id, config, lang, processed_data):
-    lang_suffix = {"zh": "_CN", "es": "_ES", "en": ""}.get(lang, "")
+def save_files(cat_id, config, bundle):
     file_base = config["file"]
     folder = config.get("folder", "")
     
-    # Filenames
-    json_filename = f"summary{lang_suffix}.json" if cat_id == "ai" else f"{file_base}{lang_suffix}.json"
-    html_filename = f"{file_base}{lang_suffix}.html"
-    
     # Target Directory
     target_dir = os.path.join(OUTPUT_DIR, folder) if folder else OUTPUT_DIR
     os.makedirs(target_dir, exist_ok=True)
     
-    # 1. Save HTML
-    html_path = os.path.join(target_dir, html_filename)
-    with open(html_path, "w", encoding="utf-8") as f:
-        f.write(generate_html(processed_data.get("title", config["name"]), processed_data, cat_id, lang))
+    # 1. Save HTML (all languages in one streamed pass; styles live in the shared news.css)
+    render_category(cat_id, config, bundle, target_dir)
     
     # [REMOVED] LEGACY root-level file saves to maintain strict /news folder structure
 
     # 3. Save App JSON (Now in categorical folder)
-    json_path = os.path.join(target_dir, json_filename)
-    app_data = []
-    for a in processed_data["articles"]:
-        app_data.append({
-            "title": a["title"], 
-            "url": a["url"], 
-            "industry": a.get("source", cat_id.upper()), 
-            "summary": a["description"], 
-            "charlotte_impact": a["why_matters"], 
-            "impact_score": int(a["score"] / 2)
-        })
-    with open(json_path, "w", encoding="utf-8") as f:
-        json.dump(app_data, f, ensure_ascii=False, indent=2)
+    for lang in ["en", "zh", "es"]:
+        processed_data = bundle.get(lang)
+        if not processed_data: continue
+        lang_suffix = LANG_SUFFIXES[lang]
+        json_filename = f"summary{lang_suffix}.json" if cat_id == "ai" else f"{file_base}{lang_suffix}.json"
+        json_path = os.path.join(target_dir, json_filename)
+        app_data = []
+        for a in processed_data["articles"]:
+            app_data.append({
+                "title": a["title"], 
+                "url": a["url"], 
+                "industry": a.get("source", cat_id.upper()), 
+                "summary": a["description"], 
+                "charlotte_impact": a["why_matters"], 
+                "impact_score": int(a["score"] / 2)
+            })
+        ARTIFACTS.write_text(json_path, json.dumps(app_data, ensure_ascii=False, indent=2))
     
-    logging.info(f"Saved {cat_id.upper()} [{lang}] artifacts to: {target_dir}")
+    logging.info(f"Saved {cat_id.upper()} artifacts to: {target_dir}")
 
-def process_category(cat_id, config):
+async def process_category(cat_id, config):
     try:
         logging.info(f"--- Processing {cat_id.upper()} ---")
-        # 1. Fetching
-        fetchers = {"global": fetch_top_news, "market": fetch_market_news, "ai": fetch_ai_news_rich, "charlotte": fetch_charlotte_news_rich}
-        raw_articles = fetchers[cat_id]()
-        unique_articles = dedupe(raw_articles)
+        # 1. Fetching, streamed through dedupe and a bounded top-K pool
+        with METRICS.timer(f"stage.fetch.{cat_id}"):
+            pool = await ingest_category(cat_id)
+        with METRICS.timer(f"stage.rank.{cat_id}"):
+            unique_articles = pool.ranked()
+        METRICS.incr(f"items.{cat_id}.raw", pool.fetched)
+        METRICS.incr(f"items.{cat_id}.unique", pool.unique)
+        METRICS.incr(f"items.{cat_id}.ranked", len(unique_articles))
         if not unique_articles: return False
+        with METRICS.timer(f"stage.store.{cat_id}"):
+            STORE.upsert(cat_id, unique_articles)
 
         # 2. Gemini EN Enrichment
-        bundle = ai_process_bundle(cat_id, unique_articles, config["name"])
+        with METRICS.timer(f"stage.enrich.{cat_id}"):
+            bundle = await ai_process_bundle(cat_id, unique_articles, config["name"])
         if not bundle or "en" not in bundle:
             logging.error(f"Failed to process enrichment for {cat_id}")
             return False
 
-        # 3. Google Translation (ZH/ES)
-        bundle["zh"] = translate_bundle(bundle, "zh")
-        bundle["es"] = translate_bundle(bundle, "es")
+        # 3. Google Translation (ZH/ES) - both languages at once; blocking client, kept off the event loop.
+        #    Google News links are decoded alongside, so rendering below does no network I/O.
+        with METRICS.timer(f"stage.translate_resolve.{cat_id}"):
+            bundle["zh"], bundle["es"], resolved = await asyncio.gather(
+                asyncio.to_thread(translate_bundle, bundle, "zh"),
+                asyncio.to_thread(translate_bundle, bundle, "es"),
+                resolve_urls([a["url"] for a in bundle["en"]["articles"] if a.get("url")]))
+        for lang_data in (bundle["en"], bundle["zh"], bundle["es"]):
+            for a in (lang_data or {}).get("articles", []):
+                a["resolved_url"] = resolved.get(a.get("url"), a.get("url"))
 
         # 4. Save All
-        for lang in ["en", "zh", "es"]:
-            lang_data = bundle.get(lang)
-            if lang_data:
-                save_files(cat_id, config, lang, lang_data)
+        with METRICS.timer(f"stage.save.{cat_id}"):
+            save_files(cat_id, config, bundle)
         
         logging.info(f"Successfully processed {cat_id.upper()} (Articles: {len(bundle['en']['articles'])})")
         return True
@@ -482,23 +1755,138 @@ def process_category(cat_id, config):
         logging.error(f"Error {cat_id.upper()}: {e}")
         return False
 
+async def run_pipeline(cat_ids):
+    """Runs several categories concurrently on one event loop. Fetching overlaps freely; only Gemini is paced (GEMINI_LIMITER)."""
+    started = time.monotonic()
+    METRICS.reset()
+    RETRY_BUDGET.reset()
+    ARTIFACTS.begin_run()
+    for folder in {CATEGORIES[cid].get("folder", "") for cid in cat_ids}:
+        target_dir = os.path.join(OUTPUT_DIR, folder) if folder else OUTPUT_DIR
+        os.makedirs(target_dir, exist_ok=True)
+        write_stylesheet(target_dir)
+    done = await asyncio.gather(*(process_category(cid, CATEGORIES[cid]) for cid in cat_ids))
+    results = dict(zip(cat_ids, done))
+    ok = [cid for cid, success in results.items() if success]
+    ARTIFACTS.report()
+    METRICS.write(categories=cat_ids, succeeded=ok)
+    logging.info(f"Pipeline finished in {time.monotonic() - started:.1f}s ({len(ok)}/{len(cat_ids)} categories succeeded)")
+    return results
+
+def checkpoint():
+    """Persists caches and trims the article store; run after every pipeline run or daemon cycle."""
+    save_caches()
+    STORE.prune(time.time() - STORE_RETENTION_DAYS * 86400)
+
+def run(cat_ids):
+    """Sync entry point: one event loop and one connection pool for the whole run."""
+    async def _run():
+        try:
+            return await run_pipeline(cat_ids)
+        finally:
+            await ENGINE.close()
+            checkpoint()
+            STORE.close()
+    return asyncio.run(_run())
+
+def due_categories(now):
+    """Categories whose interval_hours (sources.json) has elapsed since their last cycle, and when the next one falls due."""
+    due, next_at = [], None
+    for cid, config in CATEGORIES.items():
+        at = (SCHEDULE.get(cid) or 0) + config.get("interval_hours", 1) * 3600
+        if at <= now:
+            due.append(cid)
+            at = now + config.get("interval_hours", 1) * 3600
+        next_at = at if next_at is None else min(next_at, at)
+    return due, next_at
+
+async def run_daemon():
+    """Long-running mode: each category runs at its own cadence on one event loop.
+
+    The connection pool, JSON caches and article store stay open between cycles, so a cycle only
+    pays for the work itself. Schedule state is persisted, so a restart does not re-run categories
+    that are not due. SIGTERM/SIGINT stop the loop; an in-flight cycle is cancelled (artifact
+    writes are atomic) and caches are saved before exit.
+    """
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+    stopping = asyncio.ensure_future(stop.wait())
+    logging.info("Daemon started: " + ", ".join(f"{cid} every {c.get('interval_hours', 1)}h" for cid, c in CATEGORIES.items()))
+    try:
+        while not stop.is_set():
+            due, next_at = due_categories(time.time())
+            if due:
+                started = time.time()
+                cycle = asyncio.ensure_future(run_pipeline(due))
+                await asyncio.wait({cycle, stopping}, return_when=asyncio.FIRST_COMPLETED)
+                if not cycle.done():
+                    # Cancelled categories stay due, so a restart picks them up straight away
+                    logging.info("Shutdown requested, cancelling the running cycle")
+                    cycle.cancel()
+                    await asyncio.gather(cycle, return_exceptions=True)
+                else:
+                    if cycle.exception():
+                        logging.error(f"Daemon cycle failed: {cycle.exception()}")
+                    for cid in due:
+                        SCHEDULE.set(cid, started)
+                checkpoint()
+                continue
+            logging.info(f"Next cycle in {max(0, next_at - time.time()) / 60:.1f} min")
+            await asyncio.wait({stopping}, timeout=max(1.0, next_at - time.time()))
+    finally:
+        stopping.cancel()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.remove_signal_handler(sig)
+        await ENGINE.close()
+        checkpoint()
+        STORE.close()
+        logging.info("Daemon stopped")
+
+async def fetch_only(cat_ids):
+    """Dry run: the fetch stage alone (no Gemini, translation, store or output). Prints per-category counts."""
+    started = time.monotonic()
+    try:
+        pools = await asyncio.gather(*(ingest_category(cid) for cid in cat_ids))
+    finally:
+        await ENGINE.close()
+        save_caches()
+    for cid, pool in zip(cat_ids, pools):
+        print(f"{cid:<10} {pool.fetched:>5} fetched  {pool.unique:>5} unique  {len(pool.live):>4} kept")
+    print(f"fetch stage: {time.monotonic() - started:.2f}s")
+
 def main():
-    # Usage: python fetch_news.py [category|hourly|daily]
-    target = sys.argv[1] if len(sys.argv) > 1 else "hourly"
+    parser = argparse.ArgumentParser(description="Fetch, enrich, translate and publish the news pages.")
+    parser.add_argument("target", nargs="?", default="hourly", help="A category id, hourly (all but ai), daily (ai) or daemon")
+    parser.add_argument("--dry-run", "--only-fetch", dest="dry_run", action="store_true", help="Run only the fetch stage and print article counts")
+    args = parser.parse_args()
+    target = args.target
+    logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
     logging.info(f"--- NEWS AGGREGATOR STARTING (Target: {target}, HYBRID MODE) ---")
+    # Log absolute path for verification
+    logging.info(f"Base Directory: {BASE_DIR}")
+    logging.info(f"Target Output Directory: {OUTPUT_DIR}")
 
     if target in CATEGORIES:
         # Run specific category
-        process_category(target, CATEGORIES[target])
+        cat_ids = [target]
     elif target == "daily":
         # Legacy daily mode (runs AI)
-        process_category("ai", CATEGORIES["ai"])
+        cat_ids = ["ai"]
+    elif target == "daemon":
+        cat_ids = list(CATEGORIES)
+    else:
+        # Batch mode (hourly): all categories run concurrently, Gemini calls share one rate limiter
+        cat_ids = [cid for cid in CATEGORIES if cid != "ai"] # AI usually handled in its own slot
+
+    if args.dry_run:
+        asyncio.run(fetch_only(cat_ids))
+    elif target == "daemon":
+        # Service mode: replaces the cron entries, categories run at their interval_hours cadence
+        asyncio.run(run_daemon())
     else:
-        # Batch mode (legacy hourly) - though we are moving to single-category runs
-        for cid, cfg in CATEGORIES.items():
-            if cid == "ai": continue # AI usually handled in its own slot
-            process_category(cid, cfg)
-            time.sleep(20) # Increased delay to avoid Gemini rate limits
+        run(cat_ids)
 
     logging.info(f"--- {target.upper()} TASKS COMPLETED ---")
     sys.stdout.flush()